@@ -0,0 +1,142 @@
+"""Vectorized nutrition rollups.
+
+Loads a user's per-day aggregates into NumPy columns and computes daily
+totals, rolling averages, over-budget streaks and percentiles in bulk, so
+trend questions are answered server-side in one pass over years of history.
+"""
+
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+import numpy as np
+
+
+def day_columns(
+    day_totals: Iterable[tuple[date, dict]], start: date, end: date
+) -> tuple[np.ndarray, np.ndarray]:
+    """Dense per-day (calories, meals) columns covering [start, end].
+
+    Days without meals are zero.
+    """
+    rows = list(day_totals)
+    n_days = (end - start).days + 1
+    calories = np.zeros(n_days, dtype=np.int64)
+    meals = np.zeros(n_days, dtype=np.int64)
+    if rows:
+        offsets = (
+            np.fromiter((d.toordinal() for d, _ in rows), dtype=np.int64, count=len(rows))
+            - start.toordinal()
+        )
+        calories[offsets] = np.fromiter((t["calories"] for _, t in rows), dtype=np.int64, count=len(rows))
+        meals[offsets] = np.fromiter((t["meals"] for _, t in rows), dtype=np.int64, count=len(rows))
+    return calories, meals
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` days (one value per full window)."""
+    if len(values) < window:
+        return np.empty(0)
+    cumsum = np.concatenate(([0], np.cumsum(values)))
+    return (cumsum[window:] - cumsum[:-window]) / window
+
+
+def runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Start indexes and lengths of consecutive True runs."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return starts, ends - starts
+
+
+def rollup(
+    day_totals: Iterable[tuple[date, dict]],
+    start: date,
+    end: date,
+    goal: int,
+    window: int = 7,
+) -> dict:
+    """Compute trend statistics for [start, end] against a daily goal."""
+    calories, meals = day_columns(day_totals, start, end)
+    logged = meals > 0
+    logged_calories = calories[logged]
+    n_logged = int(logged.sum())
+
+    over = calories > goal
+    streak_starts, streak_lengths = runs(over)
+    longest = int(streak_lengths.argmax()) if len(streak_lengths) else None
+    current = int(streak_lengths[-1]) if len(streak_lengths) and over[-1] else 0
+
+    rolling = rolling_mean(calories, window)
+    p50, p90 = (np.percentile(logged_calories, [50, 90]) if n_logged else (0.0, 0.0))
+
+    def day_at(i: int) -> str:
+        return (start + timedelta(days=int(i))).isoformat()
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": len(calories),
+        "logged_days": n_logged,
+        "daily_goal": goal,
+        "total_calories": int(calories.sum()),
+        "total_meals": int(meals.sum()),
+        "avg_per_day": round(float(calories.mean()), 1),
+        "avg_per_logged_day": round(float(logged_calories.mean()), 1) if n_logged else 0.0,
+        "rolling_window": window,
+        "rolling_avg_latest": round(float(rolling[-1]), 1) if len(rolling) else None,
+        "rolling_avg_change": (
+            round(float(rolling[-1] - rolling[-1 - window]), 1) if len(rolling) > window else None
+        ),
+        "p50_logged_day": round(float(p50), 1),
+        "p90_logged_day": round(float(p90), 1),
+        "over_budget_days": int(over.sum()),
+        "under_budget_logged_days": int((logged & ~over).sum()),
+        "longest_over_budget_streak": {
+            "days": int(streak_lengths[longest]),
+            "start": day_at(streak_starts[longest]),
+            "end": day_at(streak_starts[longest] + streak_lengths[longest] - 1),
+        } if longest is not None else None,
+        "current_over_budget_streak": current,
+        "highest_day": (
+            {"date": day_at(calories.argmax()), "calories": int(calories.max())} if n_logged else None
+        ),
+        "lowest_logged_day": (
+            {
+                "date": day_at(np.flatnonzero(logged)[logged_calories.argmin()]),
+                "calories": int(logged_calories.min()),
+            }
+            if n_logged else None
+        ),
+    }
+
+
+def format_rollup(stats: dict) -> str:
+    """Render rollup statistics as a short text report."""
+    lines = [
+        f"Trends {stats['start']} to {stats['end']} "
+        f"({stats['logged_days']}/{stats['days']} days logged, goal {stats['daily_goal']} cal/day):",
+        f"  Total: {stats['total_calories']} cal over {stats['total_meals']} meals",
+        f"  Average: {stats['avg_per_day']} cal/day ({stats['avg_per_logged_day']} per logged day)",
+    ]
+    if stats["rolling_avg_latest"] is not None:
+        line = f"  {stats['rolling_window']}-day average: {stats['rolling_avg_latest']} cal"
+        if stats["rolling_avg_change"] is not None:
+            line += f" ({stats['rolling_avg_change']:+} vs previous {stats['rolling_window']} days)"
+        lines.append(line)
+    lines.append(f"  Median logged day: {stats['p50_logged_day']} cal, 90th percentile: {stats['p90_logged_day']} cal")
+    lines.append(
+        f"  Over budget: {stats['over_budget_days']} days, "
+        f"under budget: {stats['under_budget_logged_days']} logged days"
+    )
+    streak = stats["longest_over_budget_streak"]
+    if streak:
+        lines.append(f"  Longest over-budget streak: {streak['days']} days ({streak['start']} to {streak['end']})")
+    if stats["current_over_budget_streak"]:
+        lines.append(f"  Current over-budget streak: {stats['current_over_budget_streak']} days")
+    if stats["highest_day"]:
+        lines.append(f"  Highest day: {stats['highest_day']['date']} ({stats['highest_day']['calories']} cal)")
+        lines.append(
+            f"  Lowest logged day: {stats['lowest_logged_day']['date']} "
+            f"({stats['lowest_logged_day']['calories']} cal)"
+        )
+    return "\n".join(lines)
@@ -1,78 +1,221 @@
-"""OAuth token verification for Keycloak."""
+"""OAuth token verification for Keycloak.
 
-import asyncio
+PyJWT is imported when the first token is verified, not at import time.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
 
-from jwt import PyJWKClient, decode, InvalidTokenError
 from mcp.server.auth.provider import AccessToken, TokenVerifier
 
-from .config import OAUTH_ISSUER_URL, OAUTH_AUDIENCE
+from .config import (
+    OAUTH_ISSUER_URL,
+    OAUTH_AUDIENCE,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_NEGATIVE_TTL,
+    JWKS_REFRESH_INTERVAL,
+    JWKS_MIN_REFRESH_INTERVAL,
+)
+from .jwks import JWKSManager
+from .metrics import VERIFY_LATENCY, VERIFY_RESULTS
+
+logger = logging.getLogger(__name__)
+
+
+class UserAccessToken(AccessToken):
+    """Access token that also carries the token's subject (``sub`` claim)."""
+
+    subject: str | None = None
+
+
+def token_user_id(token: AccessToken) -> str:
+    """Identity used to partition a caller's data: the subject, else the client."""
+    return getattr(token, "subject", None) or token.client_id
+
+
+class TokenCache:
+    """Bounded LRU of verification results, keyed by a SHA-256 of the token.
+
+    Successful verifications are kept until the token's ``exp``; rejections
+    are kept for ``negative_ttl`` seconds so a flood of bad tokens is cheap.
+    """
+
+    MISS = object()
+
+    def __init__(self, max_size: int = 1024, negative_ttl: float = 5.0):
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, tuple[float, AccessToken | None]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> AccessToken | None | object:
+        """Return the cached result, or ``TokenCache.MISS``."""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return self.MISS
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, token: str, access_token: AccessToken | None) -> None:
+        """Cache a result until the token expires (or briefly, for rejections)."""
+        if self.max_size <= 0:
+            return
+        now = time.monotonic()
+        if access_token is None:
+            expires = now + self.negative_ttl
+        elif access_token.expires_at:
+            expires = now + (access_token.expires_at - time.time())
+        else:
+            return  # no exp claim: don't guess a lifetime
+        if expires <= now:
+            return
+
+        key = self._key(token)
+        self._entries[key] = (expires, access_token)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
 
 
 class OAuthTokenVerifier(TokenVerifier):
     """Verifies OAuth tokens using JWKS (works with Keycloak, Auth0, etc.)."""
 
-    def __init__(self, issuer_url: str, audience: str, algorithms: list[str] | None = None):
+    def __init__(
+        self,
+        issuer_url: str,
+        audience: str,
+        algorithms: list[str] | None = None,
+        cache: TokenCache | None = None,
+        jwks: JWKSManager | None = None,
+    ):
         self.issuer_url = issuer_url.rstrip("/")
         self.audience = audience
         self.algorithms = algorithms or ["RS256"]
         self.jwks_url = f"{self.issuer_url}/protocol/openid-connect/certs"
-        self.jwks_client = PyJWKClient(self.jwks_url)
+        self.jwks = jwks or JWKSManager(self.jwks_url)
+        self.cache = cache or TokenCache()
+
+    async def start(self) -> None:
+        """Start prefetching signing keys and background key rotation."""
+        await self.jwks.start()
+
+    async def stop(self) -> None:
+        """Stop background key rotation."""
+        await self.jwks.stop()
 
     def _normalize_issuer(self, issuer: str) -> str:
         """Normalize issuer URL for comparison (ignore http vs https)."""
         return issuer.rstrip("/").replace("https://", "").replace("http://", "")
 
     async def verify_token(self, token: str) -> AccessToken | None:
-        """Verify JWT token and return access information."""
-        try:
-            signing_key = await asyncio.to_thread(
-                self.jwks_client.get_signing_key_from_jwt, token
-            )
+        """Verify JWT token and return access information (cached per token)."""
+        started = time.perf_counter()
+        cached = self.cache.get(token)
+        if cached is not TokenCache.MISS:
+            VERIFY_RESULTS.inc(result="ok" if cached else "rejected")
+            VERIFY_LATENCY.observe(time.perf_counter() - started, cached="true")
+            return cached
 
-            # First decode without issuer check to get the actual issuer
-            payload = decode(
-                token,
-                signing_key.key,
-                algorithms=self.algorithms,
-                options={
-                    "verify_signature": True,
-                    "verify_aud": False,  # Keycloak uses 'account' as default audience
-                    "verify_exp": True,
-                    "verify_iss": False,  # We'll check manually to handle http/https
-                }
-            )
-
-            # Manually verify issuer (normalize http/https)
-            token_issuer = payload.get("iss", "")
-            if self._normalize_issuer(token_issuer) != self._normalize_issuer(self.issuer_url):
-                print(f"Issuer mismatch: expected {self.issuer_url}, got {token_issuer}")
-                return None
-
-            # Verify client_id or azp matches expected audience
-            token_client = payload.get("azp") or payload.get("client_id")
-            if self.audience and token_client != self.audience:
-                print(f"Client mismatch: expected {self.audience}, got {token_client}")
-                return None
-
-            scopes = []
-            if "scope" in payload:
-                scopes = payload["scope"].split()
-
-            return AccessToken(
-                token=token,
-                client_id=payload.get("azp") or payload.get("client_id", "unknown"),
-                scopes=scopes,
-                expires_at=payload.get("exp"),
-            )
+        from jwt import InvalidTokenError
 
+        result = "error"
+        try:
+            access_token = await self._verify(token)
+            result = "ok" if access_token else "rejected"
         except InvalidTokenError as e:
-            print(f"JWT verification failed: {e}")
+            logger.warning("JWT verification failed: %s", e)
+            result = "invalid"
+            self.cache.put(token, None)
             return None
         except Exception as e:
-            print(f"Token verification error: {e}")
+            # Transient (e.g. JWKS fetch) errors are not cached
+            logger.error("Token verification error: %r", e)
             return None
+        finally:
+            VERIFY_RESULTS.inc(result=result)
+            VERIFY_LATENCY.observe(time.perf_counter() - started, cached="false")
+
+        self.cache.put(token, access_token)
+        return access_token
+
+    async def _verify(self, token: str) -> AccessToken | None:
+        """Verify a token against the JWKS; None if it is for another issuer/client."""
+        from jwt import decode
+
+        signing_key = await self.jwks.get_signing_key_from_jwt(token)
+
+        # First decode without issuer check to get the actual issuer
+        payload = decode(
+            token,
+            signing_key.key,
+            algorithms=self.algorithms,
+            options={
+                "verify_signature": True,
+                "verify_aud": False,  # Keycloak uses 'account' as default audience
+                "verify_exp": True,
+                "verify_iss": False,  # We'll check manually to handle http/https
+            }
+        )
+
+        # Manually verify issuer (normalize http/https)
+        token_issuer = payload.get("iss", "")
+        if self._normalize_issuer(token_issuer) != self._normalize_issuer(self.issuer_url):
+            logger.warning(
+                "Issuer mismatch", extra={"expected": self.issuer_url, "got": token_issuer}
+            )
+            return None
+
+        # Verify client_id or azp matches expected audience
+        token_client = payload.get("azp") or payload.get("client_id")
+        if self.audience and token_client != self.audience:
+            logger.warning(
+                "Client mismatch", extra={"expected": self.audience, "got": token_client}
+            )
+            return None
+
+        scopes = []
+        if "scope" in payload:
+            scopes = payload["scope"].split()
+
+        return UserAccessToken(
+            token=token,
+            client_id=payload.get("azp") or payload.get("client_id", "unknown"),
+            scopes=scopes,
+            expires_at=payload.get("exp"),
+            subject=payload.get("sub"),
+        )
+
+    def cache_stats(self) -> dict:
+        """Return verified-token cache hit/miss counters."""
+        return self.cache.stats()
 
 
 def create_oauth_verifier() -> OAuthTokenVerifier:
     """Create OAuth verifier from environment variables."""
-    return OAuthTokenVerifier(issuer_url=OAUTH_ISSUER_URL, audience=OAUTH_AUDIENCE)
+    issuer_url = OAUTH_ISSUER_URL.rstrip("/")
+    return OAuthTokenVerifier(
+        issuer_url=issuer_url,
+        audience=OAUTH_AUDIENCE,
+        cache=TokenCache(max_size=TOKEN_CACHE_SIZE, negative_ttl=TOKEN_CACHE_NEGATIVE_TTL),
+        jwks=JWKSManager(
+            f"{issuer_url}/protocol/openid-connect/certs",
+            refresh_interval=JWKS_REFRESH_INTERVAL,
+            min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL,
+        ),
+    )
@@ -0,0 +1,116 @@
+"""Helpers shared by the benchmarks.
+
+``calorie-storage-bench`` and ``calorie-startup-bench`` produce the same
+kind of report: a dict of cases, each with a few measurements, plus where
+and when it was taken. This module builds and prints those reports, saves
+them as baselines and compares later runs against them, so both commands
+flag regressions the same way. ``free_port`` is shared with the load test.
+"""
+
+import json
+import os
+import platform
+import socket
+from collections.abc import Callable
+from datetime import datetime
+
+# (header, format spec, cell) for one table column
+Column = tuple[str, str, Callable[[dict], object]]
+
+
+def free_port() -> int:
+    """A local TCP port that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_report(results: dict, **settings) -> dict:
+    """Wrap benchmark results with the run's settings and environment."""
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **settings,
+        "results": results,
+    }
+
+
+def format_table(cases: dict[str, dict], columns: list[Column], width: int = 44) -> list[str]:
+    """One line per case with a cell per column, under a header line."""
+    lines = [f"{'case':<{width}}" + "".join(f" {header:{spec}}" for header, spec, _ in columns)]
+    for case, stats in cases.items():
+        row = "".join(f" {cell(stats):{spec}}" for _, spec, cell in columns)
+        lines.append(f"{case:<{width}}{row}".rstrip())
+    return lines
+
+
+def compare(
+    cases: dict[str, dict],
+    baseline: dict[str, dict],
+    keys: dict[str, str],
+    threshold: float,
+    min_delta_ms: float,
+    time_key: str,
+    width: int = 44,
+) -> tuple[list[str], bool]:
+    """Diff cases against their baseline; returns (table lines, any regression).
+
+    ``keys`` maps each compared measurement to its column header. A value
+    regresses when it exceeds ``threshold`` times its baseline; for
+    ``time_key``, changes smaller than ``min_delta_ms`` are noise and never
+    count.
+    """
+    lines = [f"{'case':<{width}}" + "".join(f" {header:>24}" for header in keys.values())]
+    regressed = False
+    for case, stats in cases.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        cells = []
+        for key in keys:
+            old, new = base[key], stats[key]
+            ratio = new / old if old else 1.0
+            mark = ""
+            noise = key == time_key and new - old < min_delta_ms
+            if ratio > threshold and not noise:
+                mark, regressed = " !", True
+            cells.append(f"{old:>9g} -> {new:<9g}{ratio:>5.2f}x{mark}")
+        lines.append(f"{case:<{width}}" + "".join(f" {cell:>24}" for cell in cells))
+    return lines, regressed
+
+
+def save_baseline(report: dict, path: str) -> None:
+    """Write a report to ``path`` as a baseline for later runs."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"\nSaved baseline to {path}")
+
+
+def compare_with_baseline(
+    report: dict,
+    path: str,
+    cases: Callable[[dict], dict[str, dict]],
+    keys: dict[str, str],
+    threshold: float,
+    min_delta_ms: float,
+    time_key: str,
+    width: int = 44,
+) -> bool:
+    """Print a report's diff against the baseline at ``path``; True on a regression.
+
+    ``cases`` extracts the comparable cases from a report (the same function
+    is applied to the baseline).
+    """
+    with open(path) as f:
+        baseline = json.load(f)
+    lines, regressed = compare(
+        cases(report), cases(baseline), keys, threshold, min_delta_ms, time_key, width
+    )
+    print(f"\nCompared with {path} (baseline from {baseline.get('created_at')}):")
+    print("\n".join(lines))
+    if regressed:
+        print(f"\nRegression: at least one case exceeded {threshold}x its baseline")
+    return regressed
@@ -0,0 +1,154 @@
+"""OAuth client-credentials tokens for the chat host.
+
+``ClientCredentialsAuth`` is an ``httpx.Auth`` that fetches a token from
+Keycloak in the background, caches it and refreshes it shortly before it
+expires, so a long chat session never sends an expired token:
+
+- ``start()`` kicks off the first fetch without waiting for it; the first
+  request awaits the token, so the fetch overlaps the rest of startup
+- a background task refreshes the token ``refresh_margin`` seconds before
+  ``expires_in`` (retrying with backoff while the old token is still valid)
+- a 401 triggers one forced refresh and a retry of the request
+
+Concurrent refreshes are collapsed into one token request.
+"""
+
+import asyncio
+import logging
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ClientCredentialsAuth(httpx.Auth):
+    """Bearer auth with a proactively refreshed client-credentials token."""
+
+    def __init__(
+        self,
+        token_url: str,
+        client_id: str,
+        client_secret: str,
+        refresh_margin: float = 30.0,
+        timeout: float = 10.0,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.refresh_margin = refresh_margin
+        self.timeout = timeout
+        self.fetches = 0
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._error: Exception | None = None
+        self._ready = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._client = http_client
+        self._owns_client = http_client is None
+
+    async def start(self) -> None:
+        """Start fetching and refreshing the token in the background."""
+        if self._task is None:
+            if self._client is None:
+                self._client = httpx.AsyncClient(timeout=self.timeout)
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the refresh task and close the token endpoint client if we created it."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "ClientCredentialsAuth":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    @property
+    def valid(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at
+
+    async def _fetch(self) -> None:
+        response = await self._client.post(
+            self.token_url,
+            data={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "client_credentials",
+            },
+        )
+        response.raise_for_status()
+        payload = response.json()
+        self._token = payload["access_token"]
+        self._expires_at = time.monotonic() + float(payload.get("expires_in", 300))
+        self._error = None
+        self.fetches += 1
+        self._ready.set()
+        logger.debug("Fetched access token (expires in %ss)", payload.get("expires_in"))
+
+    async def refresh(self, stale: str | None = None) -> None:
+        """Fetch a new token unless someone already replaced ``stale``."""
+        async with self._lock:
+            if stale is not None and self._token != stale and self.valid:
+                return
+            try:
+                await self._fetch()
+            except Exception as e:  # e.g. a malformed token response
+                self._error = e
+                if not self.valid:
+                    self._ready.set()  # wake waiters so they see the error
+                raise
+
+    def _refresh_delay(self) -> float:
+        lifetime = self._expires_at - time.monotonic()
+        return max(1.0, lifetime - min(self.refresh_margin, lifetime / 2))
+
+    async def _refresh_loop(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                await self.refresh()
+                backoff = 1.0
+                await asyncio.sleep(self._refresh_delay())
+            except Exception as e:
+                logger.warning("Token refresh failed: %s (retrying in %.0fs)", e, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def get_token(self) -> str:
+        """The current token, waiting for the first fetch if needed.
+
+        Raises the fetch error if no valid token can be obtained.
+        """
+        if self._task is None:
+            await self.start()
+        if self._token is None and self._error is None:
+            await self._ready.wait()  # first fetch still in flight
+        if not self.valid:
+            # Expired (e.g. the machine slept) or the first fetch failed
+            await self.refresh(self._token)
+        return self._token
+
+    async def async_auth_flow(self, request: httpx.Request):
+        token = await self.get_token()
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401:
+            await self.refresh(stale=token)
+            request.headers["Authorization"] = f"Bearer {self._token}"
+            yield request
+
+    def sync_auth_flow(self, request: httpx.Request):
+        raise RuntimeError("ClientCredentialsAuth only works with httpx.AsyncClient")
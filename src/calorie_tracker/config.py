@@ -11,19 +11,56 @@ load_dotenv()
 SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
 SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
 RESOURCE_SERVER_URL = os.getenv("RESOURCE_SERVER_URL", f"http://localhost:{SERVER_PORT}")
+WORKERS = int(os.getenv("WORKERS", "1"))  # server processes sharing the port
+# Sessions live in one process, so several workers need stateless streamable-http
+# (meals://today subscriptions, kept per process, are then not offered)
+STATELESS_HTTP = os.getenv("STATELESS_HTTP", str(WORKERS > 1)).lower() in ("1", "true", "yes")
 
 # OAuth settings (Keycloak)
 OAUTH_ISSUER_URL = os.getenv("OAUTH_ISSUER_URL")  # e.g., http://localhost:8180/realms/mcp
 OAUTH_AUDIENCE = os.getenv("OAUTH_AUDIENCE", "calorie-tracker")
 OAUTH_CLIENT_SECRET = os.getenv("OAUTH_CLIENT_SECRET")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))  # verified tokens kept (0 disables)
+TOKEN_CACHE_NEGATIVE_TTL = float(os.getenv("TOKEN_CACHE_NEGATIVE_TTL", "5"))  # seconds to remember rejections
+JWKS_REFRESH_INTERVAL = float(os.getenv("JWKS_REFRESH_INTERVAL", "300"))  # background key refresh (s)
+JWKS_MIN_REFRESH_INTERVAL = float(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "10"))  # unknown-kid refetch limit (s)
+
+# OAuth proxy -> Keycloak HTTP client pool
+PROXY_MAX_CONNECTIONS = int(os.getenv("PROXY_MAX_CONNECTIONS", "100"))
+PROXY_MAX_KEEPALIVE = int(os.getenv("PROXY_MAX_KEEPALIVE", "20"))
+PROXY_KEEPALIVE_EXPIRY = float(os.getenv("PROXY_KEEPALIVE_EXPIRY", "30"))  # seconds
+PROXY_TIMEOUT = float(os.getenv("PROXY_TIMEOUT", "10"))  # seconds
+PROXY_CONNECT_TIMEOUT = float(os.getenv("PROXY_CONNECT_TIMEOUT", "5"))  # seconds
+PROXY_HTTP2 = os.getenv("PROXY_HTTP2", "false").lower() in ("1", "true", "yes")  # needs httpx[http2]
 
 # Keycloak endpoints (derived from issuer URL)
 KEYCLOAK_AUTH_URL = f"{OAUTH_ISSUER_URL}/protocol/openid-connect/auth" if OAUTH_ISSUER_URL else None
 KEYCLOAK_TOKEN_URL = f"{OAUTH_ISSUER_URL}/protocol/openid-connect/token" if OAUTH_ISSUER_URL else None
 
 # Storage
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "jsonl")  # jsonl | sqlite
 DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).parent.parent.parent / "data"))
-MEALS_FILE = DATA_DIR / "meals.json"
+MEALS_FILE = DATA_DIR / "meals.json"  # legacy format, migrated on first use
+MEALS_LOG_FILE = DATA_DIR / "meals.jsonl"
+SQLITE_DB_FILE = DATA_DIR / "meals.db"
+USERS_DIR = DATA_DIR / "users"  # per-user partitions for authenticated users
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "256"))  # meals per group commit
+WRITE_BATCH_WAIT_MS = float(os.getenv("WRITE_BATCH_WAIT_MS", "0"))  # linger to grow batches
+MEAL_CACHE_ENABLED = os.getenv("MEAL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+MEAL_CACHE_MAX_BYTES = int(os.getenv("MEAL_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+STORAGE_THREADS = int(os.getenv("STORAGE_THREADS", "4"))  # thread pool for async storage reads
+
+# Metrics (Prometheus text format at /metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "50"))  # event-loop lag sampling (0 disables)
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # e.g. "calorie_tracker.auth=DEBUG,calorie_tracker.oauth_proxy=WARNING"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "10"))  # identical warnings let through per interval
+LOG_SAMPLE_INTERVAL = float(os.getenv("LOG_SAMPLE_INTERVAL", "60"))  # seconds
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records buffered before dropping
 
 # Nutrition targets
 DAILY_CALORIE_GOAL = int(os.getenv("DAILY_CALORIE_TARGET", "2000"))
@@ -0,0 +1,126 @@
+"""Bounded chat history for the host.
+
+``Conversation`` keeps the messages sent to the LLM under a token budget
+instead of resending the whole session on every request:
+
+- the system prompt and the last ``keep_turns`` turns are sent verbatim
+  (a turn is a user message plus the assistant/tool messages it caused)
+- older turns are compacted to the user message and the final answer;
+  their tool calls are dropped and the results folded into a digest that
+  keeps only the latest result per tool (e.g. the latest totals)
+- if the prompt is still over budget, the oldest turns are dropped
+
+Token counts are estimated (about four characters per token), so the
+budget is approximate; ``stats()`` reports the estimate per request and,
+when recorded, the prompt tokens the provider actually billed.
+"""
+
+DIGEST_CHARS = 300  # per tool result kept in the digest
+MESSAGE_OVERHEAD = 4  # role and separators, per message
+
+
+def estimate_tokens(message) -> int:
+    """Rough token count of one chat message."""
+    chars = len(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        chars += len(tool_call["function"]["name"]) + len(tool_call["function"]["arguments"] or "")
+    return MESSAGE_OVERHEAD + chars // 4
+
+
+class Conversation:
+    """Chat messages fitted to a token budget."""
+
+    def __init__(self, system_prompt: str, max_tokens: int = 4000, keep_turns: int = 4, count_tokens=estimate_tokens):
+        self.system = {"role": "system", "content": system_prompt}
+        self.max_tokens = max_tokens
+        self.keep_turns = max(1, keep_turns)
+        self.count_tokens = count_tokens
+        self.turns: list[list] = []
+        self.digests: dict[str, str] = {}  # tool name -> latest result of a compacted turn
+        self._compacted = 0  # the first N turns are compacted
+        self.requests = 0
+        self.last_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.dropped_turns = 0
+        self.max_billed_prompt_tokens: int | None = None
+
+    def add_user(self, content: str) -> None:
+        """Start a new turn."""
+        self.turns.append([{"role": "user", "content": content}])
+
+    def add(self, *messages) -> None:
+        """Append assistant or tool messages to the current turn."""
+        self.turns[-1].extend(messages)
+
+    def _compact(self, turn: list) -> list:
+        """Fold a turn's tool results into the digest; keep user and final text."""
+        names = {
+            tool_call["id"]: tool_call["function"]["name"]
+            for message in turn
+            for tool_call in message.get("tool_calls") or []
+        }
+        kept = []
+        for message in turn:
+            if message.get("role") == "tool":
+                name = names.get(message.get("tool_call_id"), "tool")
+                text = " ".join((message.get("content") or "").split())
+                self.digests[name] = text[:DIGEST_CHARS]
+            elif not message.get("tool_calls"):
+                kept.append(message)
+        return kept
+
+    def _digest_message(self) -> dict | None:
+        if not self.digests:
+            return None
+        lines = [f"- {name}: {text}" for name, text in self.digests.items()]
+        return {"role": "system", "content": "Latest results of earlier tool calls:\n" + "\n".join(lines)}
+
+    def messages(self) -> list:
+        """The messages for the next request, within the budget where possible.
+
+        The current turn is always sent whole, so a single oversized turn can
+        still exceed the budget.
+        """
+        while self._compacted < len(self.turns) - self.keep_turns:
+            self.turns[self._compacted] = self._compact(self.turns[self._compacted])
+            self._compacted += 1
+
+        sizes = [sum(self.count_tokens(m) for m in turn) for turn in self.turns]
+
+        def total() -> int:
+            prefix = [self.system] + ([digest] if (digest := self._digest_message()) else [])
+            return sum(self.count_tokens(m) for m in prefix) + sum(sizes)
+
+        tokens = total()
+        while tokens > self.max_tokens and len(self.turns) > 1:
+            if self._compacted:
+                self._compacted -= 1
+            else:
+                self._compact(self.turns[0])  # keep its results in the digest
+            self.turns.pop(0)
+            sizes.pop(0)
+            self.dropped_turns += 1
+            tokens = total()
+
+        self.requests += 1
+        self.last_prompt_tokens = tokens
+        self.max_prompt_tokens = max(self.max_prompt_tokens, tokens)
+        digest = self._digest_message()
+        return [self.system] + ([digest] if digest else []) + [m for turn in self.turns for m in turn]
+
+    def record_usage(self, usage) -> None:
+        """Record the provider's prompt token count for the last request."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if prompt_tokens is not None:
+            self.max_billed_prompt_tokens = max(self.max_billed_prompt_tokens or 0, prompt_tokens)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "budget": self.max_tokens,
+            "last_prompt_tokens": self.last_prompt_tokens,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "max_billed_prompt_tokens": self.max_billed_prompt_tokens,
+            "turns": len(self.turns),
+            "dropped_turns": self.dropped_turns,
+        }
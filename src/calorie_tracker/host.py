@@ -12,44 +12,164 @@ Environment variables:
     OAUTH_TOKEN_URL: Keycloak token endpoint
     OAUTH_CLIENT_ID: Keycloak client ID
     OAUTH_CLIENT_SECRET: Keycloak client secret
+    OAUTH_REFRESH_MARGIN: Seconds before expiry to refresh the token (default: 30)
     OPENAI_API_KEY: OpenAI API key for LLM
+    LLM_MODEL: litellm model name (default: openai/gpt-4o-mini)
+    MAX_TOOL_CONCURRENCY: Tool calls run concurrently per round (default: 4)
+    MAX_TOOL_ROUNDS: Tool-call rounds allowed per user message (default: 5)
+    CONTEXT_TOKEN_BUDGET: Approximate prompt token cap per LLM request (default: 4000)
+    CONTEXT_KEEP_TURNS: Recent turns sent verbatim (default: 4)
+    LLM_STREAM: Stream responses and start tools as their calls arrive (default: true)
+
+Set LLM_MODEL=stub to chat against a local rule-based model (no API key).
 """
 
 import asyncio
+import importlib
+import json
 import os
+import statistics
+import time
+from functools import partial
 
 import httpx
 from mcp import ClientSession
 from mcp.client.streamable_http import streamable_http_client
-import litellm
-from litellm import experimental_mcp_client
 from dotenv import load_dotenv
 
+from .client_auth import ClientCredentialsAuth
+from .conversation import Conversation
+from .stub_llm import StubLLM
+
 load_dotenv()
 
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://localhost:8000/mcp")
 OAUTH_TOKEN_URL = os.getenv("OAUTH_TOKEN_URL", "http://localhost:8180/realms/mcp/protocol/openid-connect/token")
 OAUTH_CLIENT_ID = os.getenv("OAUTH_CLIENT_ID", "calorie-tracker")
 OAUTH_CLIENT_SECRET = os.getenv("OAUTH_CLIENT_SECRET")
+OAUTH_REFRESH_MARGIN = float(os.getenv("OAUTH_REFRESH_MARGIN", "30"))
+LLM_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o-mini")
+MAX_TOOL_CONCURRENCY = int(os.getenv("MAX_TOOL_CONCURRENCY", "4"))  # tool calls in flight at once
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "5"))  # LLM -> tools round trips per message
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "4000"))
+CONTEXT_KEEP_TURNS = int(os.getenv("CONTEXT_KEEP_TURNS", "4"))
+LLM_STREAM = os.getenv("LLM_STREAM", "true").lower() == "true"
+
+
+def completion_source():
+    """The ``acompletion`` callable for LLM_MODEL."""
+    if LLM_MODEL == "stub":
+        return StubLLM().acompletion
+    import litellm
+
+    return partial(litellm.acompletion, model=LLM_MODEL)
+
+
+async def call_tool(session: ClientSession, tool_call: dict, semaphore: asyncio.Semaphore) -> str:
+    """Run one tool call and return its text result."""
+    from litellm import experimental_mcp_client
+
+    async with semaphore:
+        print(f"  [Calling: {tool_call['function']['name']}]")
+        result = await experimental_mcp_client.call_openai_tool(
+            session=session,
+            openai_tool=tool_call,
+        )
+    text = result.content[0].text if result.content else ""
+    return f"Error: {text}" if result.isError and not text.startswith("Error") else text
 
 
-def get_oauth_token() -> str | None:
-    """Get OAuth token from Keycloak using client credentials."""
-    if not OAUTH_CLIENT_SECRET:
-        return None
+async def run_tool_calls(session: ClientSession, tool_calls: list, limit: int = MAX_TOOL_CONCURRENCY) -> list[dict]:
+    """Run tool calls concurrently over the shared session.
 
-    response = httpx.post(
-        OAUTH_TOKEN_URL,
-        data={
-            "client_id": OAUTH_CLIENT_ID,
-            "client_secret": OAUTH_CLIENT_SECRET,
-            "grant_type": "client_credentials",
-        },
+    Returns one tool message per call, in the order of ``tool_calls``. A
+    failing call becomes an error message for the model and doesn't cancel
+    the others.
+    """
+    semaphore = asyncio.Semaphore(limit)
+    results = await asyncio.gather(
+        *(call_tool(session, tool_call, semaphore) for tool_call in tool_calls),
+        return_exceptions=True,
     )
-    if response.status_code == 200:
-        return response.json().get("access_token")
-    print(f"Failed to get token: {response.text}")
-    return None
+    return tool_messages(tool_calls, results)
+
+
+def tool_messages(tool_calls: list, results: list) -> list[dict]:
+    """Tool messages for gathered results (exceptions become error text)."""
+    messages = []
+    for tool_call, result in zip(tool_calls, results):
+        if isinstance(result, BaseException):
+            result = f"Error: {type(result).__name__}: {result}"
+        print(f"  [Result: {result}]")
+        messages.append({
+            "role": "tool",
+            "content": result,
+            "tool_call_id": tool_call["id"],
+        })
+    return messages
+
+
+def _arguments_complete(arguments: str) -> bool:
+    if not arguments.rstrip().endswith("}"):
+        return False
+    try:
+        json.loads(arguments)
+    except ValueError:
+        return False
+    return True
+
+
+async def read_stream(stream, on_tool_call) -> tuple[dict, object, float | None]:
+    """Print a streamed reply as it arrives and assemble the assistant message.
+
+    Tool-call deltas are merged by index. Each call is handed to
+    ``on_tool_call`` as soon as its arguments are complete: once they parse
+    as JSON, when the next call starts, or at the end of the stream.
+    Returns (message, usage or None, perf_counter time of the first delta).
+    """
+    content: list[str] = []
+    calls: list[dict] = []
+    handed_off = 0
+    usage = None
+    first_delta = None
+
+    def hand_off(upto: int):
+        nonlocal handed_off
+        while handed_off < upto:
+            on_tool_call(calls[handed_off])
+            handed_off += 1
+
+    async for chunk in stream:
+        usage = getattr(chunk, "usage", None) or usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if first_delta is None and (delta.content or delta.tool_calls):
+            first_delta = time.perf_counter()
+        if delta.content:
+            if not content:
+                print("Assistant: ", end="")
+            print(delta.content, end="", flush=True)
+            content.append(delta.content)
+        for part in delta.tool_calls or []:
+            while len(calls) <= part.index:
+                calls.append({"id": None, "type": "function", "function": {"name": "", "arguments": ""}})
+            hand_off(part.index)  # calls are streamed one after another
+            call = calls[part.index]
+            call["id"] = part.id or call["id"]
+            if part.function is not None:
+                call["function"]["name"] += part.function.name or ""
+                call["function"]["arguments"] += part.function.arguments or ""
+            if part.index == handed_off and _arguments_complete(call["function"]["arguments"]):
+                hand_off(part.index + 1)
+    hand_off(len(calls))
+    if content:
+        print("\n")
+
+    message = {"role": "assistant", "content": "".join(content) or None}
+    if calls:
+        message["tool_calls"] = calls
+    return message, usage, first_delta
 
 
 async def chat_loop(session: ClientSession, tools: list):
@@ -58,10 +178,13 @@ async def chat_loop(session: ClientSession, tools: list):
     system_prompt = """You are a helpful calorie tracking assistant.
 You help users log their meals and track their daily calorie intake.
 When a user tells you about food they ate, use the log_meal tool to record it.
+If they mention several foods at once, record them all with one log_meals call.
 When they ask about their progress, use get_today_summary.
 Be encouraging and helpful about their nutrition goals."""
 
-    messages = [{"role": "system", "content": system_prompt}]
+    conversation = Conversation(system_prompt, max_tokens=CONTEXT_TOKEN_BUDGET, keep_turns=CONTEXT_KEEP_TURNS)
+    complete = completion_source()
+    first_token_times: list[float] = []
 
     print("\n" + "=" * 50)
     print("Calorie Tracker Chat")
@@ -70,74 +193,95 @@ Be encouraging and helpful about their nutrition goals."""
     print("Type 'quit' to exit.\n")
 
     while True:
-        user_input = input("You: ").strip()
+        # Read in a thread so the token refresher keeps running while we wait
+        user_input = (await asyncio.to_thread(input, "You: ")).strip()
 
         if user_input.lower() in ["quit", "exit", "q"]:
+            stats = conversation.stats()
+            print(f"Prompt tokens: max {stats['max_prompt_tokens']} of {stats['budget']} budgeted "
+                  f"over {stats['requests']} requests")
+            if first_token_times:
+                print(f"Time to first token: median {statistics.median(first_token_times) * 1000:.0f} ms "
+                      f"over {len(first_token_times)} responses")
             print("Goodbye!")
             break
 
         if not user_input:
             continue
 
-        messages.append({"role": "user", "content": user_input})
-
-        # Get LLM response
-        response = await litellm.acompletion(
-            model="openai/gpt-4o-mini",
-            messages=messages,
-            tools=tools
-        )
-
-        assistant_message = response["choices"][0]["message"]
-
-        # Check if LLM wants to call tools
-        if assistant_message.get("tool_calls"):
-            messages.append(assistant_message)
-
-            # Execute each tool call
-            for tool_call in assistant_message["tool_calls"]:
-                print(f"  [Calling: {tool_call['function']['name']}]")
-
-                result = await experimental_mcp_client.call_openai_tool(
-                    session=session,
-                    openai_tool=tool_call,
+        conversation.add_user(user_input)
+
+        # Keep going while the LLM asks for tools (it may chain rounds, e.g.
+        # log the meals, then check the summary); stop offering tools at the cap
+        for round_no in range(MAX_TOOL_ROUNDS + 1):
+            request = {
+                "messages": conversation.messages(),
+                "tools": tools,
+                "tool_choice": "auto" if round_no < MAX_TOOL_ROUNDS else "none",
+            }
+            if LLM_STREAM:
+                # Tools start while the rest of the reply is still streaming
+                semaphore = asyncio.Semaphore(MAX_TOOL_CONCURRENCY)
+                pending = []
+                started = time.perf_counter()
+                # Ask for a final usage chunk, else streamed replies report no token counts
+                stream = await complete(**request, stream=True, stream_options={"include_usage": True})
+                assistant_message, usage, first_delta = await read_stream(
+                    stream,
+                    lambda call: pending.append(asyncio.ensure_future(call_tool(session, call, semaphore))),
                 )
-
-                tool_result = result.content[0].text
-                print(f"  [Result: {tool_result}]")
-
-                messages.append({
-                    "role": "tool",
-                    "content": tool_result,
-                    "tool_call_id": tool_call["id"],
-                })
-
-            # Get final response after tool execution
-            response = await litellm.acompletion(
-                model="openai/gpt-4o-mini",
-                messages=messages,
-                tools=tools
-            )
+                if first_delta is not None:
+                    first_token_times.append(first_delta - started)
+                conversation.record_usage(usage)
+                if not assistant_message.get("tool_calls"):
+                    break
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                conversation.add(assistant_message)
+                conversation.add(*tool_messages(assistant_message["tool_calls"], results))
+                continue
+
+            response = await complete(**request)
+            conversation.record_usage(getattr(response, "usage", None))
             assistant_message = response["choices"][0]["message"]
+            if not assistant_message.get("tool_calls"):
+                print(f"Assistant: {assistant_message['content']}\n")
+                break
+
+            conversation.add(assistant_message)
+            conversation.add(*await run_tool_calls(session, assistant_message["tool_calls"]))
 
-        # Print assistant response
-        print(f"Assistant: {assistant_message['content']}\n")
-        messages.append({"role": "assistant", "content": assistant_message["content"]})
+        conversation.add({"role": "assistant", "content": assistant_message["content"]})
 
 
-async def main():
+async def chat():
     print(f"Connecting to MCP server at {MCP_SERVER_URL}...")
 
-    # Get OAuth token from Keycloak
-    headers = {}
-    token = get_oauth_token()
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-        print("Authentication: OAuth token obtained")
+    # The token is fetched in the background while we connect, then kept fresh
+    auth = None
+    if OAUTH_CLIENT_SECRET:
+        auth = ClientCredentialsAuth(
+            OAUTH_TOKEN_URL,
+            OAUTH_CLIENT_ID,
+            OAUTH_CLIENT_SECRET,
+            refresh_margin=OAUTH_REFRESH_MARGIN,
+        )
+        await auth.start()
+        print("Authentication: OAuth client credentials (refreshed before expiry)")
     else:
         print("Authentication: None (set OAUTH_CLIENT_SECRET to enable)")
 
-    async with httpx.AsyncClient(headers=headers) as http_client:
+    try:
+        await run_session(auth)
+    finally:
+        if auth:
+            await auth.stop()
+
+
+async def run_session(auth: httpx.Auth | None):
+    """Connect to the MCP server and run the chat."""
+    # litellm takes seconds to import; load it while we connect
+    litellm_import = asyncio.create_task(asyncio.to_thread(importlib.import_module, "litellm"))
+    async with httpx.AsyncClient(auth=auth) as http_client:
         async with streamable_http_client(MCP_SERVER_URL, http_client=http_client) as (
             read_stream,
             write_stream,
@@ -147,6 +291,9 @@ async def main():
                 await session.initialize()
 
                 # Load tools from MCP server
+                await litellm_import
+                from litellm import experimental_mcp_client
+
                 tools = await experimental_mcp_client.load_mcp_tools(
                     session=session,
                     format="openai"
@@ -158,5 +305,10 @@ async def main():
                 await chat_loop(session, tools)
 
 
+def main():
+    """Run the chat client."""
+    asyncio.run(chat())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
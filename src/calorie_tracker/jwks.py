@@ -0,0 +1,150 @@
+"""Async JWKS key manager.
+
+Keeps the identity provider's signing keys in memory: they are fetched when
+the server starts and refreshed in the background before they go stale, so
+verifying a token is a dictionary lookup. The first fetch runs in the
+background, so the server can start listening meanwhile; requests that
+arrive before it completes wait for it. A token carrying an unknown
+``kid`` (e.g. right after a key rotation) triggers one refresh that all
+concurrent requests share, rate-limited by ``min_refresh_interval``.
+"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+
+if TYPE_CHECKING:  # PyJWT (and cryptography) load with the first key fetch
+    from jwt import PyJWK
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSManager:
+    """Caches JWKS signing keys and refreshes them without blocking requests."""
+
+    def __init__(
+        self,
+        jwks_url: str,
+        refresh_interval: float = 300.0,
+        min_refresh_interval: float = 10.0,
+        timeout: float = 5.0,
+        http_client: httpx.AsyncClient | None = None,
+    ):
+        self.jwks_url = jwks_url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.fetches = 0
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        self._keys: dict[str | None, "PyJWK"] = {}
+        self._last_attempt = float("-inf")
+        self._inflight: asyncio.Task | None = None
+        self._refresher: asyncio.Task | None = None
+
+    @property
+    def keys(self) -> dict[str | None, "PyJWK"]:
+        """Currently known signing keys by kid."""
+        return dict(self._keys)
+
+    async def start(self) -> None:
+        """Start prefetching keys (without waiting) and the background refresher."""
+        if self._refresher is None:
+            self._inflight = asyncio.create_task(self._fetch())
+            self._inflight.add_done_callback(self._log_prefetch)
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    @staticmethod
+    def _log_prefetch(task: asyncio.Task) -> None:
+        # The refresher and unknown-kid path will retry
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("JWKS prefetch failed: %r", task.exception())
+
+    async def stop(self) -> None:
+        """Stop the refresher and close the HTTP client if we created it."""
+        for task in (self._refresher, self._inflight):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._refresher = self._inflight = None
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def refresh(self) -> None:
+        """Fetch the key set; concurrent callers share one in-flight fetch."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+        await asyncio.shield(self._inflight)
+
+    async def _fetch(self) -> None:
+        if self._http_client is None:
+            # Building the client loads the TLS trust store; don't block the loop
+            self._http_client = await asyncio.to_thread(httpx.AsyncClient, timeout=self.timeout)
+        self.fetches += 1
+        self._last_attempt = time.monotonic()
+        response = await self._http_client.get(self.jwks_url)
+        response.raise_for_status()
+        # Importing PyJWT/cryptography and loading keys is slow: keep it off the loop
+        self._keys = await asyncio.to_thread(self._parse, response.json())
+
+    @staticmethod
+    def _parse(jwks: dict) -> dict[str | None, "PyJWK"]:
+        from jwt import PyJWKSet
+        from jwt.exceptions import PyJWKSetError
+
+        keys = {}
+        for jwk in PyJWKSet.from_dict(jwks).keys:
+            if jwk.public_key_use in ("sig", None):
+                keys[jwk.key_id] = jwk
+        if not keys:
+            raise PyJWKSetError("The JWKS endpoint did not contain any signing keys")
+        return keys
+
+    async def _refresh_loop(self) -> None:
+        """Refresh on a fixed interval; retry sooner after a failure."""
+        delay = self.refresh_interval
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.refresh()
+                delay = self.refresh_interval
+            except Exception as e:
+                logger.error("JWKS refresh failed: %r", e, extra={"cached_keys": len(self._keys)})
+                delay = self.min_refresh_interval
+
+    def _lookup(self, kid: str | None) -> "PyJWK | None":
+        key = self._keys.get(kid)
+        if key is None and kid is None and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+        return key
+
+    async def get_signing_key(self, kid: str | None) -> "PyJWK":
+        """Return the key for a kid, refreshing once if it is unknown."""
+        from jwt import InvalidTokenError
+
+        key = self._lookup(kid)
+        if key is not None:
+            return key
+
+        if self._inflight is not None and not self._inflight.done():
+            await asyncio.shield(self._inflight)  # e.g. the startup prefetch
+            key = self._lookup(kid)
+        elif time.monotonic() - self._last_attempt >= self.min_refresh_interval:
+            await self.refresh()
+            key = self._lookup(kid)
+        if key is None:
+            raise InvalidTokenError(f"Unable to find a signing key that matches: {kid!r}")
+        return key
+
+    async def get_signing_key_from_jwt(self, token: str) -> "PyJWK":
+        """Return the key that signed a JWT (by its header's kid)."""
+        from jwt import get_unverified_header
+
+        return await self.get_signing_key(get_unverified_header(token).get("kid"))
@@ -0,0 +1,328 @@
+"""
+End-to-end load generator for the Calorie Tracker MCP server.
+
+Starts the server in-process on a free local port (and, with ``--auth``, a
+stub identity provider signing RS256 tokens), then drives N concurrent MCP
+client sessions over streamable-http with a configurable tool mix. Prints
+throughput, latency percentiles and error rates as JSON. Runs fully
+offline against a throwaway data directory.
+
+Examples:
+    calorie-loadtest --sessions 20 --calls 50
+    calorie-loadtest --auth --users 5 --mix log_meal=3,get_today_summary=1
+    calorie-loadtest --backend sqlite --output results.json
+
+Settings are applied through environment variables before the server
+module is imported, so each process can run one load test.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+
+import httpx
+
+from .benchmarking import free_port
+
+FOODS = [
+    ("Oatmeal", 150), ("Banana", 105), ("Chicken salad", 420), ("Rice bowl", 610),
+    ("Apple", 95), ("Pasta", 520), ("Yogurt", 120), ("Steak", 680),
+]
+
+DEFAULT_MIX = "log_meal=1,get_today_summary=1"
+
+
+def tool_arguments(tool: str, rng: random.Random) -> dict:
+    """Arguments for one call of ``tool``."""
+    if tool == "log_meal":
+        food, calories = rng.choice(FOODS)
+        return {"food": food, "calories": calories}
+    if tool == "log_meals":
+        return {"meals": [{"food": f, "calories": c} for f, c in rng.sample(FOODS, 3)]}
+    if tool == "get_summary":
+        return {"start": date.today().isoformat(), "include_meals": False}
+    return {}
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse ``tool=weight,...`` into a weight per tool."""
+    mix = {}
+    for part in spec.split(","):
+        tool, _, weight = part.partition("=")
+        mix[tool.strip()] = float(weight or 1)
+    if not mix or any(w < 0 for w in mix.values()) or not sum(mix.values()):
+        raise ValueError(f"Invalid tool mix: {spec!r}")
+    return mix
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """p50/p95/p99/mean/max in milliseconds."""
+    values = sorted(latencies)
+    return {
+        "p50": round(percentile(values, 50) * 1000, 3),
+        "p95": round(percentile(values, 95) * 1000, 3),
+        "p99": round(percentile(values, 99) * 1000, 3),
+        "mean": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a daemon thread."""
+
+    def __init__(self, app, port: int):
+        import uvicorn
+
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class Results:
+    """Per-tool latencies and errors collected by the workers."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.session_errors = 0
+        self.connect_latencies: list[float] = []
+        self.error_samples: list[str] = []
+
+    def error(self, tool: str, message: str):
+        self.errors[tool] += 1
+        if len(self.error_samples) < 5:
+            self.error_samples.append(f"{tool}: {message}")
+
+    def report(self, elapsed: float) -> dict:
+        calls = sum(len(v) for v in self.latencies.values())
+        errors = sum(self.errors.values())
+        return {
+            "duration_s": round(elapsed, 3),
+            "calls": calls,
+            "errors": errors,
+            "error_rate": round(errors / calls, 4) if calls else 0.0,
+            "session_errors": self.session_errors,
+            "throughput_rps": round(calls / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": latency_summary([x for v in self.latencies.values() for x in v]),
+            "connect_ms": latency_summary(self.connect_latencies),
+            "tools": {
+                tool: {
+                    "calls": len(values),
+                    "errors": self.errors[tool],
+                    "latency_ms": latency_summary(values),
+                }
+                for tool, values in sorted(self.latencies.items())
+            },
+            "error_samples": self.error_samples,
+        }
+
+
+async def fetch_token(token_url: str, username: str) -> str:
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            token_url,
+            data={"grant_type": "client_credentials", "username": username},
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+async def run_session(
+    url: str,
+    token: str | None,
+    calls: int,
+    mix: dict[str, float],
+    rng: random.Random,
+    results: Results,
+    start_gate: asyncio.Event,
+):
+    """One client: connect, wait for the start gate, then issue ``calls`` tool calls."""
+    from mcp import ClientSession
+    from mcp.client.streamable_http import streamable_http_client
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    tools, weights = list(mix), list(mix.values())
+    try:
+        async with httpx.AsyncClient(headers=headers, timeout=60) as http_client:
+            connect_start = time.perf_counter()
+            async with streamable_http_client(url, http_client=http_client) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    results.connect_latencies.append(time.perf_counter() - connect_start)
+                    await start_gate.wait()
+                    for _ in range(calls):
+                        tool = rng.choices(tools, weights)[0]
+                        start = time.perf_counter()
+                        try:
+                            result = await session.call_tool(tool, tool_arguments(tool, rng))
+                        except Exception as e:
+                            results.latencies[tool].append(time.perf_counter() - start)
+                            results.error(tool, repr(e))
+                            continue
+                        results.latencies[tool].append(time.perf_counter() - start)
+                        if result.isError:
+                            text = result.content[0].text if result.content else ""
+                            results.error(tool, text)
+    except Exception as e:
+        results.session_errors += 1
+        if len(results.error_samples) < 5:
+            results.error_samples.append(f"session: {e!r}")
+
+
+async def drive(args, url: str, token_url: str | None) -> dict:
+    mix = parse_mix(args.mix)
+    results = Results()
+    tokens = [None] * args.sessions
+    if token_url:
+        usernames = [f"loadtest-user-{i % args.users}" for i in range(args.sessions)]
+        tokens = await asyncio.gather(*(fetch_token(token_url, u) for u in usernames))
+
+    # Connect every session first so the timed phase measures tool calls only.
+    start_gate = asyncio.Event()
+    workers = [
+        asyncio.create_task(run_session(
+            url, tokens[i], args.calls, mix, random.Random(args.seed + i), results, start_gate,
+        ))
+        for i in range(args.sessions)
+    ]
+    deadline = time.monotonic() + 30
+    while len(results.connect_latencies) + results.session_errors < args.sessions:
+        if time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.01)
+
+    from .metrics import recent_loop_lag
+
+    recent_loop_lag.clear()
+    start = time.perf_counter()
+    start_gate.set()
+    await asyncio.gather(*workers)
+    report = results.report(time.perf_counter() - start)
+    # Sampled on the server's event loop; high values mean tools blocked it
+    report["event_loop_lag_ms"] = latency_summary(list(recent_loop_lag))
+    report["config"] = {
+        "sessions": args.sessions,
+        "calls_per_session": args.calls,
+        "mix": mix,
+        "auth": args.auth,
+        "users": args.users if args.auth else 1,
+        "backend": args.backend,
+        "history": args.history,
+    }
+    return report
+
+
+def seed_history(args) -> None:
+    """Give every load-test user ``--history`` past meals before the run."""
+    from .storage import DEFAULT_USER, get_storage
+    from .storage.benchmark import seed
+
+    users = [f"loadtest-user-{i}" for i in range(args.users)] if args.auth else [DEFAULT_USER]
+    storage = get_storage()
+    for user in users:
+        seed(storage, args.history, user)
+
+
+def run(args) -> dict:
+    """Start the stub IdP (optional) and the server, run the load, return the report."""
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="calorie-loadtest-")
+    server_port = free_port()
+    os.environ.update({
+        "DATA_DIR": data_dir,
+        "STORAGE_BACKEND": args.backend,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(server_port),
+        "RESOURCE_SERVER_URL": f"http://127.0.0.1:{server_port}",
+    })
+    os.environ.pop("OAUTH_ISSUER_URL", None)
+
+    idp = idp_server = None
+    if args.auth:
+        from .stub_idp import StubIdentityProvider
+
+        idp_port = free_port()
+        idp = StubIdentityProvider(f"http://127.0.0.1:{idp_port}", client_id="calorie-tracker")
+        idp_server = BackgroundServer(idp.app(), idp_port).__enter__()
+        os.environ["OAUTH_ISSUER_URL"] = idp.issuer_url
+        os.environ["OAUTH_AUDIENCE"] = idp.client_id
+
+    if "calorie_tracker.server" in sys.modules:
+        raise RuntimeError("The load test must configure the server before it is imported")
+    from .server import create_app
+
+    if args.history:
+        seed_history(args)
+
+    # FastMCP configures INFO logging for itself; per-request lines would drown the report.
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    try:
+        with BackgroundServer(create_app(), server_port):
+            report = asyncio.run(drive(
+                args,
+                f"http://127.0.0.1:{server_port}/mcp",
+                idp.token_url if idp else None,
+            ))
+    finally:
+        if idp_server:
+            idp_server.__exit__(None, None, None)
+    report["data_dir"] = data_dir
+    return report
+
+
+def main():
+    """Run the load test and print the JSON report."""
+    parser = argparse.ArgumentParser(description="Load test the Calorie Tracker MCP server")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent client sessions")
+    parser.add_argument("--calls", type=int, default=20, help="tool calls per session")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"tool weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--auth", action="store_true", help="enable OAuth with a local stub IdP")
+    parser.add_argument("--users", type=int, default=1, help="distinct token subjects with --auth")
+    parser.add_argument("--backend", choices=["jsonl", "sqlite"], default="jsonl")
+    parser.add_argument("--history", type=int, default=0, help="past meals seeded per user before the run")
+    parser.add_argument("--data-dir", help="data directory (default: a new temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Non-blocking structured logging.
+
+Request handlers only enqueue log records; a background listener thread
+formats and writes them, so a slow terminal or log collector never stalls
+the event loop. If the queue fills up, records are dropped rather than
+blocking; the count is exported at ``/metrics`` and logged at shutdown.
+
+Settings (see config.py):
+    LOG_LEVEL: default level for calorie_tracker loggers (default: INFO)
+    LOG_LEVELS: per-module overrides, e.g. "calorie_tracker.auth=DEBUG,calorie_tracker.oauth_proxy=WARNING"
+    LOG_FORMAT: "text" or "json"
+    LOG_SAMPLE_BURST / LOG_SAMPLE_INTERVAL: let at most BURST copies of the
+        same warning/error through per INTERVAL seconds; the rest are counted
+        and reported on the next one that gets through
+"""
+
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import (
+    LOG_LEVEL,
+    LOG_LEVELS,
+    LOG_FORMAT,
+    LOG_SAMPLE_BURST,
+    LOG_SAMPLE_INTERVAL,
+    LOG_QUEUE_SIZE,
+)
+
+ROOT_LOGGER = "calorie_tracker"
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+_handler: "NonBlockingQueueHandler | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra=`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Classic text lines with ``extra=`` fields appended as key=value."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS}
+        if extras:
+            line += " " + " ".join(f"{k}={v}" for k, v in extras.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Rate-limit repeated warnings/errors per (logger, message template)."""
+
+    def __init__(self, burst: int, interval: float, min_level: int = logging.WARNING):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.min_level = min_level
+        self._windows: dict[tuple[str, str], list] = {}  # key -> [window start, seen, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level or self.burst <= 0:
+            return True
+
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self._windows[key] = window = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            window[1] += 1
+            if window[1] > self.burst:
+                window[2] += 1
+                return False
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec: str) -> dict[str, str]:
+    """Parse "module=LEVEL,module=LEVEL" into a dict."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging() -> None:
+    """Route calorie_tracker logs through a queue to a background writer (idempotent)."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(LOG_SAMPLE_BURST, LOG_SAMPLE_INTERVAL))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [_handler]
+    root.setLevel(LOG_LEVEL.upper())
+    root.propagate = False
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def dropped_records() -> int:
+    """Records dropped because the queue was full, since setup_logging()."""
+    return _handler.dropped if _handler is not None else 0
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background writer.
+
+    Later records are written directly, and the number of dropped records
+    (if any) is logged last.
+    """
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger(ROOT_LOGGER).handlers[:] = list(_listener.handlers)
+    if _handler.dropped:
+        logging.getLogger(__name__).warning(
+            "Dropped %d log records because the log queue was full", _handler.dropped
+        )
+    _listener = _handler = None
@@ -0,0 +1,237 @@
+"""Prometheus-style metrics.
+
+A small in-process registry of counters and histograms rendered in the
+Prometheus text exposition format at ``/metrics``. Recording a sample is a
+dict lookup, a bisect and an add under a lock, cheap enough to leave on in
+production.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable
+from contextlib import asynccontextmanager, suppress
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics: list["Metric"] = []
+_collectors: list[Callable[[], list[str]]] = []
+
+
+def _format_value(value: float) -> str:
+    """Integral values without exponent notation, others at full precision."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    """Bucketed observations (cumulative buckets, sum and count) per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._series: dict[tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+def register_collector(collector: Callable[[], list[str]]) -> None:
+    """Add a callback that returns extra exposition lines at scrape time."""
+    _collectors.append(collector)
+
+
+def gauge_lines(name: str, documentation: str, values: dict[str, float], label: str | None = None) -> list[str]:
+    """Exposition lines for a gauge, optionally with one label."""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        labels = f'{{{label}="{key}"}}' if label else ""
+        lines.append(f"{name}{labels} {_format_value(value)}")
+    return lines
+
+
+def render() -> str:
+    """Render every metric and collector in the text exposition format."""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception:
+            continue  # a broken collector must not break the scrape
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Serve metrics for Prometheus to scrape."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+# =============================================================================
+# Metrics recorded by the server
+# =============================================================================
+
+TOOL_CALLS = Counter("mcp_tool_calls_total", "MCP tool calls by tool and outcome.", ("tool", "status"))
+TOOL_LATENCY = Histogram("mcp_tool_duration_seconds", "MCP tool latency.", ("tool",))
+
+STORAGE_LATENCY = Histogram("storage_operation_duration_seconds", "Storage load/save latency.", ("op",))
+STORAGE_BYTES = Counter(
+    "storage_bytes_total", "Bytes read from and written to meal files (JSONL engine).", ("direction",)
+)
+
+VERIFY_RESULTS = Counter("auth_verify_total", "Token verifications by result.", ("result",))
+VERIFY_LATENCY = Histogram("auth_verify_duration_seconds", "verify_token latency.", ("cached",))
+
+UPSTREAM_LATENCY = Histogram(
+    "keycloak_token_request_duration_seconds", "Latency of token requests proxied to Keycloak.", ("status",)
+)
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop woke up a sleeping task.", buckets=LAG_BUCKETS
+)
+recent_loop_lag: deque[float] = deque(maxlen=10_000)  # latest samples, for in-process reports
+
+
+@asynccontextmanager
+async def monitor_event_loop(interval: float = 0.05):
+    """Sample event-loop lag while the context is open.
+
+    A task sleeps for ``interval`` and records how much later than scheduled
+    it woke up. Anything blocking the loop (sync I/O in a tool, heavy JSON)
+    shows up as lag.
+    """
+    async def sample():
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - scheduled)
+            LOOP_LAG.observe(lag)
+            recent_loop_lag.append(lag)
+
+    task = asyncio.create_task(sample())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+def track_tool(fn: Callable) -> Callable:
+    """Record call count and latency for an MCP tool (sync or async)."""
+    tool = fn.__name__
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = await fn(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool)
+                TOOL_CALLS.inc(tool=tool, status=status)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = fn(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            TOOL_LATENCY.observe(time.perf_counter() - start, tool=tool)
+            TOOL_CALLS.inc(tool=tool, status=status)
+    return wrapper
@@ -9,8 +9,15 @@ Flow:
 2. Claude.ai → GET /authorize → Redirects to Keycloak
 3. User authenticates with Keycloak → Redirects to Claude.ai callback
 4. Claude.ai → POST /token → We proxy to Keycloak → Returns access token
+
+Token requests share one long-lived, pooled HTTP client (keep-alive, optional
+HTTP/2) that lives for the lifetime of the app.
 """
 
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from urllib.parse import urlencode
 
 import httpx
@@ -22,7 +29,65 @@ from .config import (
     OAUTH_CLIENT_SECRET,
     KEYCLOAK_AUTH_URL,
     KEYCLOAK_TOKEN_URL,
+    PROXY_MAX_CONNECTIONS,
+    PROXY_MAX_KEEPALIVE,
+    PROXY_KEEPALIVE_EXPIRY,
+    PROXY_TIMEOUT,
+    PROXY_CONNECT_TIMEOUT,
+    PROXY_HTTP2,
 )
+from .metrics import UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled client used to talk to Keycloak."""
+    http2 = PROXY_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("PROXY_HTTP2 is set but 'h2' is not installed (pip install 'httpx[http2]'); using HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=PROXY_MAX_CONNECTIONS,
+            max_keepalive_connections=PROXY_MAX_KEEPALIVE,
+            keepalive_expiry=PROXY_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(PROXY_TIMEOUT, connect=PROXY_CONNECT_TIMEOUT),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if the app lifespan has not."""
+    global _http_client
+    if _http_client is None:
+        _http_client = create_http_client()
+    return _http_client
+
+
+@asynccontextmanager
+async def http_client_lifespan():
+    """Create the shared client at app start and close it on shutdown.
+
+    Loading the TLS trust store is blocking work, so the client is built in a
+    worker thread and the event loop stays free while the app starts.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = await asyncio.to_thread(create_http_client)
+    try:
+        yield
+    finally:
+        client, _http_client = _http_client, None
+        if client is not None:
+            await client.aclose()
 
 
 async def oauth_metadata(request: Request) -> JSONResponse:
@@ -56,10 +121,14 @@ async def authorize(request: Request) -> RedirectResponse:
         filtered_scopes = requested_scopes & supported_scopes
         filtered_scopes.add("openid")  # Always include openid
         params["scope"] = " ".join(filtered_scopes)
-        print(f"Filtered scopes: {requested_scopes} -> {filtered_scopes}")
+        logger.debug(
+            "Filtered scopes",
+            extra={"requested": sorted(requested_scopes), "kept": sorted(filtered_scopes)},
+        )
 
     keycloak_url = f"{KEYCLOAK_AUTH_URL}?{urlencode(params)}"
-    print(f"Redirecting to Keycloak: {keycloak_url}")
+    # Don't log the full URL: its query carries state and PKCE challenge values
+    logger.debug("Redirecting to Keycloak", extra={"client_id": params.get("client_id")})
     return RedirectResponse(url=keycloak_url, status_code=302)
 
 
@@ -73,23 +142,44 @@ async def token(request: Request) -> JSONResponse:
     if "client_secret" not in data and OAUTH_CLIENT_SECRET:
         data["client_secret"] = OAUTH_CLIENT_SECRET
 
-    print(f"Proxying token request to Keycloak: grant_type={data.get('grant_type')}")
+    logger.debug("Proxying token request", extra={"grant_type": data.get("grant_type")})
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(KEYCLOAK_TOKEN_URL, data=data)
+    started = time.perf_counter()
+    try:
+        response = await get_http_client().post(KEYCLOAK_TOKEN_URL, data=data)
+    except httpx.HTTPError as e:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - started, status="error")
+        logger.error("Token request to Keycloak failed: %r", e)
+        return JSONResponse(
+            {"error": "temporarily_unavailable", "error_description": "Authorization server unreachable"},
+            status_code=502,
+        )
+    UPSTREAM_LATENCY.observe(time.perf_counter() - started, status=str(response.status_code))
 
     if response.status_code == 200:
         return JSONResponse(response.json())
     else:
-        print(f"Token error from Keycloak: {response.text}")
+        logger.warning(
+            "Token error from Keycloak",
+            extra={
+                "status": response.status_code,
+                "grant_type": data.get("grant_type"),
+                "error": response.text[:200],
+            },
+        )
         return JSONResponse(
             response.json() if response.headers.get("content-type", "").startswith("application/json") else {"error": response.text},
             status_code=response.status_code
         )
 
 
-def register_oauth_routes(mcp) -> None:
-    """Register OAuth proxy routes with the MCP server."""
+def register_oauth_routes(mcp):
+    """Register OAuth proxy routes with the MCP server.
+
+    Returns the lifespan hook that owns the shared Keycloak HTTP client; the
+    server enters it for the lifetime of the app.
+    """
     mcp.custom_route("/.well-known/oauth-authorization-server", methods=["GET"])(oauth_metadata)
     mcp.custom_route("/authorize", methods=["GET"])(authorize)
     mcp.custom_route("/token", methods=["POST"])(token)
+    return http_client_lifespan
@@ -3,7 +3,11 @@ Calorie Tracker MCP Server
 
 MCP server with OAuth authentication (Keycloak) that provides:
 - log_meal: Log a meal with calories
+- log_meals: Log several meals in one call
 - get_today_summary: Get today's meals and total calories
+- get_summary: Meals and totals for a date range, grouped by day/week/month
+- get_trends: Averages, streaks and percentiles over a date range
+- meals://today: Today's totals as a subscribable resource
 
 Run with:
     uv run python -m calorie_tracker.server
@@ -16,53 +20,102 @@ Environment variables:
 Without OAUTH_ISSUER_URL, server runs without authentication.
 """
 
-from mcp.server.fastmcp import FastMCP
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import date, datetime, timedelta
+from functools import cache, partial
+from itertools import groupby, takewhile
+from typing import Annotated, Literal
+
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.auth.middleware.auth_context import get_access_token
 from mcp.server.auth.settings import AuthSettings
-from pydantic import AnyHttpUrl
+from mcp.server.session import ServerSession
+from pydantic import AnyHttpUrl, AnyUrl, BaseModel, Field
 
 from .config import (
     SERVER_HOST,
     SERVER_PORT,
     RESOURCE_SERVER_URL,
+    WORKERS,
+    STATELESS_HTTP,
     OAUTH_ISSUER_URL,
     OAUTH_AUDIENCE,
     DAILY_CALORIE_GOAL,
+    METRICS_ENABLED,
+    LOOP_LAG_INTERVAL_MS,
 )
-from .storage import load_meals, add_meal
+from .metrics import gauge_lines, metrics_endpoint, monitor_event_loop, register_collector, track_tool
+from .storage import DEFAULT_USER, day_range, get_async_storage, get_storage, get_writer, make_meal
 
 
 # =============================================================================
-# MCP Server Setup
+# Metrics
 # =============================================================================
 
-if OAUTH_ISSUER_URL:
-    from .auth import create_oauth_verifier
-
-    mcp = FastMCP(
-        "CalorieTracker",
-        host=SERVER_HOST,
-        port=SERVER_PORT,
-        token_verifier=create_oauth_verifier(),
-        auth=AuthSettings(
-            issuer_url=AnyHttpUrl(OAUTH_ISSUER_URL),
-            resource_server_url=AnyHttpUrl(RESOURCE_SERVER_URL),
-            required_scopes=[],
-        ),
+def _runtime_metrics() -> list[str]:
+    """Scrape-time gauges from the caches, the writer and the log queue."""
+    from .logging_config import dropped_records
+
+    lines = []
+    storage = get_storage()
+    if hasattr(storage, "stats"):
+        lines += gauge_lines("meal_cache", "Write-through meal cache counters.", storage.stats(), "stat")
+    lines += gauge_lines("meal_writer", "Group-commit writer counters.", get_writer().stats(), "stat")
+    lines += gauge_lines(
+        "log_records_dropped", "Log records dropped because the log queue was full.", {"": dropped_records()}
     )
+    lines += gauge_lines("server_worker", "Worker process that served this scrape.", {str(os.getpid()): 1}, "pid")
+    if verifier:
+        lines += gauge_lines("token_cache", "Verified-token cache counters.", verifier.cache_stats(), "stat")
+    return lines
+
+
+# =============================================================================
+# Caller identity
+# =============================================================================
 
-    # Register OAuth proxy routes for Claude.ai integration
-    from .oauth_proxy import register_oauth_routes
-    register_oauth_routes(mcp)
-else:
-    mcp = FastMCP("CalorieTracker", host=SERVER_HOST, port=SERVER_PORT)
+def current_user(ctx: Context) -> str:
+    """Storage partition for the caller: the verified token's subject/client_id."""
+    if not OAUTH_ISSUER_URL:
+        return DEFAULT_USER
+
+    request = ctx.request_context.request
+    auth_user = request.scope.get("user") if request is not None else None
+    token = getattr(auth_user, "access_token", None) or get_access_token()
+    if not token:
+        return DEFAULT_USER
+    from .auth import token_user_id
+
+    return token_user_id(token)
 
 
 # =============================================================================
 # MCP Tools
 # =============================================================================
 
-@mcp.tool()
-def log_meal(food: str, calories: int) -> str:
+MAX_MEALS_PER_BATCH = 50
+SUMMARY_PAGE_SIZE = 50
+MAX_SUMMARY_PAGE = 200
+
+
+class MealEntry(BaseModel):
+    """One meal in a log_meals batch."""
+
+    food: str = Field(min_length=1, description='Description of the food (e.g., "2 eggs")')
+    calories: int = Field(ge=0, description="Estimated calories")
+    timestamp: datetime | None = Field(
+        default=None, description="When it was eaten (ISO 8601); defaults to now"
+    )
+
+
+@track_tool
+async def log_meal(food: str, calories: int, ctx: Context) -> str:
     """
     Log a meal with its calorie count.
 
@@ -73,42 +126,463 @@ def log_meal(food: str, calories: int) -> str:
     Returns:
         Confirmation message with running total
     """
-    add_meal(food, calories)
-    meals = load_meals()
+    # Concurrent calls are batched into one group commit by the writer thread
+    meal = make_meal(food, calories)
+    user = current_user(ctx)
+    totals = await asyncio.wrap_future(get_writer().submit([meal], user))
+    await notify_today_updated(user)
 
-    total = sum(m["calories"] for m in meals)
+    total = totals[-1]
     remaining = DAILY_CALORIE_GOAL - total
 
     return f"Logged: {food} ({calories} cal). Today's total: {total}/{DAILY_CALORIE_GOAL} cal. Remaining: {remaining} cal."
 
 
-@mcp.tool()
-def get_today_summary() -> str:
+@track_tool
+async def log_meals(
+    meals: Annotated[list[MealEntry], Field(min_length=1, max_length=MAX_MEALS_PER_BATCH)],
+    ctx: Context,
+) -> str:
+    """
+    Log several meals at once (e.g., "eggs, toast, coffee and an orange").
+
+    Args:
+        meals: Meals to log, each with food, calories and an optional timestamp
+
+    Returns:
+        One combined confirmation with today's running total
+    """
+    records = []
+    for entry in meals:
+        timestamp = entry.timestamp
+        if timestamp is not None and timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)  # stored as local time
+        records.append(make_meal(entry.food, entry.calories, timestamp))
+
+    user = current_user(ctx)
+    totals = await asyncio.wrap_future(get_writer().submit(records, user))
+
+    today = date.today().isoformat()
+    today_totals = [t for meal, t in zip(records, totals) if meal["timestamp"].startswith(today)]
+    if today_totals:
+        await notify_today_updated(user)
+    total = today_totals[-1] if today_totals else (await get_async_storage().get_day_total(user))["calories"]
+    remaining = DAILY_CALORIE_GOAL - total
+
+    logged = ", ".join(f"{m['food']} ({m['calories']} cal)" for m in records)
+    batch_calories = sum(m["calories"] for m in records)
+    return (
+        f"Logged {len(records)} meal{'s' if len(records) != 1 else ''}: {logged} = {batch_calories} cal. "
+        f"Today's total: {total}/{DAILY_CALORIE_GOAL} cal. Remaining: {remaining} cal."
+    )
+
+
+def _encode_cursor(day: date, after: str, skip: int, shown: int) -> str:
+    """Opaque page cursor: resume after ``skip`` meals stamped ``after``."""
+    payload = json.dumps([day.isoformat(), after, skip, shown], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, day: date) -> tuple[str, int, int]:
+    """Decode a cursor issued for ``day`` into (after, skip, shown)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_day, after, skip, shown = json.loads(raw)
+        datetime.fromisoformat(after)
+        if not (isinstance(skip, int) and isinstance(shown, int) and skip > 0 and shown >= 0):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
+    if cursor_day != day.isoformat():
+        raise ValueError("Cursor has expired (it was issued for another day)")
+    return after, skip, shown
+
+
+@track_tool
+async def get_today_summary(
+    ctx: Context,
+    limit: Annotated[int, Field(ge=1, le=MAX_SUMMARY_PAGE)] = SUMMARY_PAGE_SIZE,
+    cursor: str | None = None,
+    compact: bool = False,
+) -> str:
     """
     Get a summary of today's meals and calorie intake.
 
+    Args:
+        limit: Maximum number of meals to list (default: 50)
+        cursor: Cursor from a previous page to continue listing after it
+        compact: Only return the totals, without listing meals
+
     Returns:
-        Summary of all meals logged today with totals
+        Today's meals (one page) with totals, and a cursor if more remain
     """
-    meals = load_meals()
+    user = current_user(ctx)
+    storage = get_async_storage()
+    totals = await storage.get_day_total(user)
 
-    if not meals:
+    if not totals["meals"]:
         return f"No meals logged today. Daily goal: {DAILY_CALORIE_GOAL} cal."
 
-    total = sum(m["calories"] for m in meals)
+    total = totals["calories"]
     remaining = DAILY_CALORIE_GOAL - total
+    footer = [
+        "",
+        f"Total: {total}/{DAILY_CALORIE_GOAL} cal",
+        f"Remaining: {remaining} cal" + (" (over budget!)" if remaining < 0 else ""),
+    ]
+    if compact:
+        return "\n".join([f"Today: {totals['meals']} meals", *footer[1:]])
+
+    # Keyset pagination: the cursor names the last timestamp shown and how many
+    # meals with that timestamp were shown, so each page is one bounded range read
+    start, end = day_range()
+    after, skip, shown = _decode_cursor(cursor, start.date()) if cursor else (None, 0, 0)
+    lo = datetime.fromisoformat(after) if after else start
+    page = await storage.load_meals(user, lo, end, skip=skip, limit=limit + 1)
+    more = len(page) > limit
+    page = page[:limit]
+
+    lines = ["Today's Meals:"]
+    lines.extend(
+        f"  {i}. {meal['food']} - {meal['calories']} cal"
+        for i, meal in enumerate(page, shown + 1)
+    )
+    lines.extend(footer)
+    if more:
+        last = page[-1]["timestamp"]
+        same = sum(1 for _ in takewhile(lambda m: m["timestamp"] == last, reversed(page)))
+        if same == len(page) and last == after:
+            same += skip
+        next_cursor = _encode_cursor(start.date(), last, same, shown + len(page))
+        lines.append(
+            f"\nShowing meals {shown + 1}-{shown + len(page)} of {totals['meals']}. "
+            f'For more, call again with cursor="{next_cursor}".'
+        )
+    return "\n".join(lines)
+
+
+def _bucket_start(day: date, granularity: str) -> date:
+    """First day of the day/week (Monday)/month bucket containing a day."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _bucket_end(bucket: date, granularity: str) -> date:
+    """Last day of a bucket."""
+    if granularity == "week":
+        return bucket + timedelta(days=6)
+    if granularity == "month":
+        next_month = (bucket.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return next_month - timedelta(days=1)
+    return bucket
+
+
+@track_tool
+async def get_summary(
+    start: date,
+    ctx: Context,
+    end: date | None = None,
+    granularity: Literal["day", "week", "month"] = "day",
+    include_meals: bool = True,
+    format: Literal["text", "json"] = "text",
+) -> str:
+    """
+    Get meals and calorie totals for a date range.
+
+    Args:
+        start: First day of the range (YYYY-MM-DD)
+        end: Last day of the range, inclusive (defaults to start)
+        granularity: Group totals by "day", "week" (Monday-based) or "month"
+        include_meals: List individual meals under each group
+        format: "text" for a readable summary, "json" for structured data
+
+    Returns:
+        Meals and totals per group, plus the overall total against the goal
+    """
+    end = end or start
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    user = current_user(ctx)
+    storage = get_async_storage()
+    # Rows of (day, calories, meals, meal or None), in day order
+    if include_meals:
+        range_start = datetime.combine(start, datetime.min.time())
+        range_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+        meals = await storage.load_meals(user, range_start, range_end)
+        rows = [(date.fromisoformat(m["timestamp"][:10]), m["calories"], 1, m) for m in meals]
+    else:
+        # Totals only: fold the per-day aggregates, O(days) instead of O(meals)
+        rows = [(day, t["calories"], t["meals"], None) for day, t in await storage.day_totals(user, start, end)]
+
+    buckets = []
+    for bucket, group in groupby(rows, key=lambda row: _bucket_start(row[0], granularity)):
+        group = list(group)
+        first, last = max(bucket, start), min(_bucket_end(bucket, granularity), end)
+        buckets.append({
+            "start": first.isoformat(),
+            "end": last.isoformat(),
+            "calories": sum(row[1] for row in group),
+            "meals": sum(row[2] for row in group),
+            "goal": DAILY_CALORIE_GOAL * ((last - first).days + 1),
+            "items": [row[3] for row in group if row[3] is not None],
+        })
+
+    total = sum(b["calories"] for b in buckets)
+    goal = DAILY_CALORIE_GOAL * ((end - start).days + 1)
+
+    if format == "json":
+        return json.dumps({
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "granularity": granularity,
+            "daily_goal": DAILY_CALORIE_GOAL,
+            "buckets": buckets,
+            "total": {
+                "calories": total,
+                "meals": sum(b["meals"] for b in buckets),
+                "goal": goal,
+                "remaining": goal - total,
+            },
+        })
+
+    title = start.isoformat() if start == end else f"{start} to {end}"
+    if not buckets:
+        return f"No meals logged for {title}. Goal: {goal} cal."
+
+    lines = [f"Meals for {title}:"]
+    for b in buckets:
+        label = b["start"] if b["start"] == b["end"] else f"{b['start']} to {b['end']}"
+        lines.append(f"\n{label}: {b['calories']}/{b['goal']} cal ({b['meals']} meals)")
+        lines.extend(
+            f"  {i}. {meal['food']} - {meal['calories']} cal"
+            for i, meal in enumerate(b["items"], 1)
+        )
+
+    remaining = goal - total
+    lines.append(f"\nTotal: {total}/{goal} cal")
+    lines.append(f"Remaining: {remaining} cal" + (" (over budget!)" if remaining < 0 else ""))
+    return "\n".join(lines)
+
+
+@track_tool
+async def get_trends(
+    ctx: Context,
+    start: date | None = None,
+    end: date | None = None,
+    window: Annotated[int, Field(ge=1, le=90)] = 7,
+    format: Literal["text", "json"] = "text",
+) -> str:
+    """
+    Get nutrition trends: daily averages, rolling average, over-budget
+    streaks and percentiles. All arithmetic is done server-side.
+
+    Args:
+        start: First day (YYYY-MM-DD); defaults to 30 days before end
+        end: Last day, inclusive; defaults to today
+        window: Days in the rolling average (default 7)
+        format: "text" for a short report, "json" for structured data
+
+    Returns:
+        Trend statistics for the range against the daily calorie goal
+    """
+    from .analytics import format_rollup, rollup
+
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    user = current_user(ctx)
+    stats = rollup(
+        await get_async_storage().day_totals(user, start, end),
+        start,
+        end,
+        goal=DAILY_CALORIE_GOAL,
+        window=window,
+    )
+    return json.dumps(stats) if format == "json" else format_rollup(stats)
+
+
+# =============================================================================
+# MCP Resources
+# =============================================================================
+
+TODAY_URI = "meals://today"
+MAX_SNAPSHOTS = 1024
+
+# user -> (cache key, rendered JSON); the key changes whenever the day or the
+# user's storage version does, so unchanged reads skip the storage entirely
+_today_snapshots: dict[str, tuple[tuple, str]] = {}
+# user -> sessions subscribed to meals://today (closed sessions drop out). Per
+# process: only writes made by this worker notify them
+_today_subscribers: dict[str, weakref.WeakSet[ServerSession]] = {}
+
+
+async def today_snapshot(user: str) -> str:
+    """Today's totals for a user as JSON, re-rendered only when they changed."""
+    storage = get_async_storage()
+    version = await storage.version(user)
+    key = (date.today().isoformat(), version)
+    cached = _today_snapshots.get(user)
+    if version is not None and cached and cached[0] == key:
+        return cached[1]
+
+    totals = await storage.get_day_total(user)
+    snapshot = json.dumps({
+        "date": key[0],
+        "calories": totals["calories"],
+        "meals": totals["meals"],
+        "goal": DAILY_CALORIE_GOAL,
+        "remaining": DAILY_CALORIE_GOAL - totals["calories"],
+        "updated_at": totals["updated_at"],
+        "version": hashlib.sha256(repr(key).encode()).hexdigest()[:16],
+    })
+    if version is not None:
+        _today_snapshots.pop(user, None)
+        _today_snapshots[user] = (key, snapshot)
+        if len(_today_snapshots) > MAX_SNAPSHOTS:
+            del _today_snapshots[next(iter(_today_snapshots))]
+    return snapshot
+
+
+async def today_resource() -> str:
+    return await today_snapshot(current_user(create_server().get_context()))
+
+
+async def notify_today_updated(user: str) -> None:
+    """Send resources/updated for meals://today to the user's subscribed sessions."""
+    sessions = list(_today_subscribers.get(user, ()))
+    if not sessions:
+        return
+    results = await asyncio.gather(
+        *(session.send_resource_updated(AnyUrl(TODAY_URI)) for session in sessions),
+        return_exceptions=True,
+    )
+    for session, result in zip(sessions, results):
+        if isinstance(result, Exception):
+            _today_subscribers[user].discard(session)  # session went away
+
+
+async def subscribe_resource(uri: AnyUrl) -> None:
+    if str(uri) != TODAY_URI:
+        raise ValueError(f"Unknown resource: {uri}")
+    ctx = create_server().get_context()
+    _today_subscribers.setdefault(current_user(ctx), weakref.WeakSet()).add(ctx.session)
+
+
+async def unsubscribe_resource(uri: AnyUrl) -> None:
+    ctx = create_server().get_context()
+    _today_subscribers.get(current_user(ctx), weakref.WeakSet()).discard(ctx.session)
 
-    summary = "Today's Meals:\n"
-    for i, meal in enumerate(meals, 1):
-        summary += f"  {i}. {meal['food']} - {meal['calories']} cal\n"
 
-    summary += f"\nTotal: {total}/{DAILY_CALORIE_GOAL} cal"
-    summary += f"\nRemaining: {remaining} cal"
+def _get_capabilities(base_get_capabilities, *args, **kwargs):
+    """FastMCP never advertises resource subscriptions; we handle them."""
+    capabilities = base_get_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = not STATELESS_HTTP  # needs a live session
+    return capabilities
 
-    if remaining < 0:
-        summary += " (over budget!)"
 
-    return summary
+# =============================================================================
+# MCP Server Setup
+# =============================================================================
+
+TOOLS = [log_meal, log_meals, get_today_summary, get_summary, get_trends]
+
+verifier = None  # set by create_server() when OAuth is enabled
+lifespan_hooks = []  # async context manager factories entered for the app's lifetime
+
+
+@cache
+def create_server() -> FastMCP:
+    """Build the FastMCP server and register the tools and resources.
+
+    Nothing is built at import time: the server (and, with OAuth, the token
+    verifier) is created on first use, so importing this module stays cheap.
+    """
+    global verifier
+
+    if OAUTH_ISSUER_URL:
+        from .auth import create_oauth_verifier
+
+        verifier = create_oauth_verifier()
+        mcp = FastMCP(
+            "CalorieTracker",
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            stateless_http=STATELESS_HTTP,
+            token_verifier=verifier,
+            auth=AuthSettings(
+                issuer_url=AnyHttpUrl(OAUTH_ISSUER_URL),
+                resource_server_url=AnyHttpUrl(RESOURCE_SERVER_URL),
+                required_scopes=[],
+            ),
+        )
+
+        # Register OAuth proxy routes for Claude.ai integration
+        from .oauth_proxy import register_oauth_routes
+        lifespan_hooks.append(register_oauth_routes(mcp))
+    else:
+        mcp = FastMCP("CalorieTracker", host=SERVER_HOST, port=SERVER_PORT, stateless_http=STATELESS_HTTP)
+
+    if METRICS_ENABLED:
+        mcp.custom_route("/metrics", methods=["GET"])(metrics_endpoint)
+        register_collector(_runtime_metrics)
+
+    if LOOP_LAG_INTERVAL_MS > 0:
+        lifespan_hooks.append(partial(monitor_event_loop, LOOP_LAG_INTERVAL_MS / 1000))
+
+    for tool in TOOLS:
+        mcp.tool()(tool)
+    mcp.resource(
+        TODAY_URI,
+        name="today",
+        title="Today's calories",
+        description="Today's calorie total, meal count and remaining budget (subscribe for updates)",
+        mime_type="application/json",
+    )(today_resource)
+    mcp._mcp_server.subscribe_resource()(subscribe_resource)
+    mcp._mcp_server.unsubscribe_resource()(unsubscribe_resource)
+    mcp._mcp_server.get_capabilities = partial(_get_capabilities, mcp._mcp_server.get_capabilities)
+    return mcp
+
+
+def __getattr__(name: str):
+    # ``server.mcp`` (e.g. for ``mcp dev``) builds the server on first access
+    if name == "mcp":
+        return create_server()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@asynccontextmanager
+async def app_lifespan(app):
+    """Start process-wide resources around FastMCP's session manager."""
+    from .logging_config import setup_logging, shutdown_logging
+
+    async with AsyncExitStack() as stack:
+        setup_logging()  # worker processes don't run main()
+        stack.callback(shutdown_logging)
+        if verifier:
+            await verifier.start()  # starts fetching JWKS keys in the background
+            stack.push_async_callback(verifier.stop)
+        for hook in lifespan_hooks:
+            await stack.enter_async_context(hook())
+        await stack.enter_async_context(create_server().session_manager.run())
+        yield
+
+
+def create_app():
+    """Build the streamable-HTTP ASGI app with our startup/shutdown hooks.
+
+    Also the factory each worker process calls when WORKERS > 1.
+    """
+    app = create_server().streamable_http_app()
+    app.router.lifespan_context = app_lifespan
+    return app
 
 
 # =============================================================================
@@ -117,6 +591,12 @@ def get_today_summary() -> str:
 
 def main():
     """Run the MCP server."""
+    import uvicorn
+
+    from .logging_config import setup_logging, shutdown_logging
+
+    setup_logging()
+    log_level = create_server().settings.log_level.lower()
     print(f"Starting CalorieTracker MCP server on {SERVER_HOST}:{SERVER_PORT}")
     if OAUTH_ISSUER_URL:
         print("Authentication: ENABLED (OAuth/Keycloak)")
@@ -125,7 +605,27 @@ def main():
     else:
         print("Authentication: DISABLED (development mode)")
         print("  Set OAUTH_ISSUER_URL to enable OAuth")
-    mcp.run(transport="streamable-http")
+
+    if WORKERS > 1:
+        # uvicorn's supervisor binds the port once and each worker process
+        # imports the app factory, sharing configuration through the environment
+        print(f"Workers: {WORKERS}")
+        uvicorn.run(
+            "calorie_tracker.server:create_app",
+            factory=True,
+            workers=WORKERS,
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            log_level=log_level,
+        )
+    else:
+        uvicorn.run(
+            create_app(),
+            host=SERVER_HOST,
+            port=SERVER_PORT,
+            log_level=log_level,
+        )
+    shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,179 @@
+"""Startup benchmarks.
+
+Measures cold starts in fresh interpreters:
+
+- import time of the server and host modules (``python -X importtime``),
+  with the packages that account for most of it
+- time to listening: from launching ``calorie-tracker`` until its port
+  accepts connections, with and without OAuth (the identity provider is
+  unreachable, so a start that waits on it shows up here)
+
+Each case reports the median of ``--repeat`` runs. Like
+``calorie-storage-bench``, results can be saved as a baseline and compared
+later; the run exits non-zero on a regression. The summary also says
+whether time to listening met its target (``--max-listen-ms``, sub-second
+by default), and a missed target fails the run too.
+
+Examples:
+    calorie-startup-bench --save bench/startup.json
+    calorie-startup-bench --compare bench/startup.json --max-listen-ms 800
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from .benchmarking import compare_with_baseline, format_table, free_port, make_report, save_baseline
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+MODULES = ["calorie_tracker.server", "calorie_tracker.host"]
+LISTEN_TIMEOUT_S = 30
+LISTEN_TARGET_MS = 1000.0
+
+
+def base_env(**overrides) -> dict:
+    """Environment for a throwaway server without OAuth (unless overridden)."""
+    env = dict(os.environ, DATA_DIR=tempfile.mkdtemp(prefix="calorie-startup-"), OAUTH_ISSUER_URL="")
+    env.update(overrides)
+    return env
+
+
+def import_profile(module: str, top: int = 5) -> dict:
+    """Import ``module`` in a new interpreter; total and per-package import ms."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=base_env(), capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total = 0
+    packages: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0) + int(self_us)
+        if not indent:
+            total += int(cumulative_us)
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "ms": round(total / 1000, 1),
+        "process_ms": round(wall * 1000, 1),
+        "top": {name: round(us / 1000, 1) for name, us in heaviest},
+    }
+
+
+def time_to_listening(**env) -> dict:
+    """Launch the server and time until its port accepts a connection."""
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "calorie_tracker.server"],
+        env=base_env(SERVER_HOST="127.0.0.1", SERVER_PORT=str(port), WORKERS="1", **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    start = time.perf_counter()
+    try:
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"Server exited with {proc.returncode}:\n{proc.stderr.read()[-2000:]}")
+                if time.perf_counter() - start > LISTEN_TIMEOUT_S:
+                    raise RuntimeError(f"Server did not listen within {LISTEN_TIMEOUT_S}s")
+                time.sleep(0.005)
+        return {"ms": round((time.perf_counter() - start) * 1000, 1)}
+    finally:
+        proc.terminate()
+        try:
+            proc.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+
+
+def median_run(fn, repeat: int) -> dict:
+    """The run with the median ``ms`` out of ``repeat``."""
+    runs = sorted((fn() for _ in range(repeat)), key=lambda r: r["ms"])
+    return runs[(len(runs) - 1) // 2]
+
+
+def run(repeat: int) -> dict:
+    """Profile every case; returns the report dict."""
+    results: dict[str, dict] = {}
+    for module in MODULES:
+        print(f"  import {module} ...", file=sys.stderr, flush=True)
+        results[f"import {module}"] = median_run(lambda: import_profile(module), repeat)
+    print("  time to listening ...", file=sys.stderr, flush=True)
+    results["listen"] = median_run(time_to_listening, repeat)
+    unreachable = f"http://127.0.0.1:{free_port()}/realms/mcp"
+    results["listen[oauth]"] = median_run(lambda: time_to_listening(OAUTH_ISSUER_URL=unreachable), repeat)
+    return make_report(results, repeat=repeat)
+
+
+def cases(report: dict) -> dict[str, dict]:
+    return report.get("results", {})
+
+
+def heaviest(stats: dict) -> str:
+    return ", ".join(f"{name} {ms:g}" for name, ms in stats.get("top", {}).items())
+
+
+COLUMNS = [
+    ("ms", ">8", lambda stats: f"{stats['ms']:g}"),
+    ("heaviest imports (self ms)", "", heaviest),
+]
+
+
+def format_report(report: dict) -> list[str]:
+    return format_table(cases(report), COLUMNS, width=32)
+
+
+def main():
+    """Run the startup benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark import time and time to listening")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (the median is kept)")
+    parser.add_argument("--save", help="write the results to this baseline file")
+    parser.add_argument("--compare", help="diff the results against this baseline file")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="ratio above baseline that counts as a regression (default: 1.5)")
+    parser.add_argument("--min-delta-ms", type=float, default=100.0,
+                        help="ignore changes smaller than this (default: 100)")
+    parser.add_argument("--max-listen-ms", type=float, default=LISTEN_TARGET_MS,
+                        help=f"fail when time to listening exceeds this target (default: {LISTEN_TARGET_MS:g}; 0 disables)")
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+    print("\n".join(format_report(report)))
+    failed = False
+
+    if args.save:
+        save_baseline(report, args.save)
+
+    if args.compare:
+        failed = compare_with_baseline(
+            report, args.compare, cases, {"ms": "ms"}, args.threshold, args.min_delta_ms, time_key="ms", width=32
+        )
+
+    if args.max_listen_ms:
+        slowest = max(stats["ms"] for case, stats in report["results"].items() if case.startswith("listen"))
+        met = slowest <= args.max_listen_ms
+        print(f"\nTime to listening: {slowest:g} ms (target {args.max_listen_ms:g} ms): {'met' if met else 'MISSED'}")
+        failed = failed or not met
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
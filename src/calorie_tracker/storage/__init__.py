@@ -0,0 +1,108 @@
+"""Meal storage.
+
+The engine is selected with the ``STORAGE_BACKEND`` setting:
+
+- ``jsonl`` (default): append-only JSON Lines file
+- ``sqlite``: SQLite database in WAL mode, indexed on (user, timestamp)
+
+Each user's meals are stored in a separate partition (see
+``partitioned.py``). Unless ``MEAL_CACHE_ENABLED`` is off, the engine is wrapped in a write-through
+in-memory cache of recent days (see ``cached.py``). Writes from the server go
+through a single group-commit writer (see ``writer.py``); async tools read
+through ``AsyncStorage`` (see ``aio.py``), which runs engine calls on a
+bounded thread pool.
+"""
+
+import atexit
+from collections.abc import Callable
+from functools import cache
+from pathlib import Path
+
+from ..config import (
+    STORAGE_BACKEND,
+    MEALS_FILE,
+    MEALS_LOG_FILE,
+    SQLITE_DB_FILE,
+    DATA_DIR,
+    USERS_DIR,
+    MEAL_CACHE_ENABLED,
+    MEAL_CACHE_MAX_BYTES,
+    STORAGE_THREADS,
+    WRITE_BATCH_MAX,
+    WRITE_BATCH_WAIT_MS,
+)
+from .aio import AsyncStorage
+from .base import DEFAULT_USER, StorageBackend, day_range, make_meal
+from .cached import CachedStorage
+from .jsonl import JsonlStorage
+from .partitioned import PartitionedStorage
+from .sqlite import SQLiteStorage
+from .writer import GroupCommitWriter
+
+BACKENDS = ("jsonl", "sqlite")
+
+
+def engine_factory(backend: str = STORAGE_BACKEND) -> Callable[[Path], StorageBackend]:
+    """Return a function that creates an engine storing its files in a directory."""
+    if backend == "jsonl":
+        return lambda directory: JsonlStorage(
+            directory / MEALS_LOG_FILE.name, legacy_file=directory / MEALS_FILE.name
+        )
+    if backend == "sqlite":
+        return lambda directory: SQLiteStorage(directory / SQLITE_DB_FILE.name)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r} (expected 'jsonl' or 'sqlite')")
+
+
+def create_storage(backend: str = STORAGE_BACKEND) -> StorageBackend:
+    """Create per-user partitioned storage for an engine."""
+    return PartitionedStorage(engine_factory(backend), root=DATA_DIR, users_dir=USERS_DIR)
+
+
+@cache
+def get_storage() -> StorageBackend:
+    """Return the configured storage engine (created once per process)."""
+    storage = create_storage()
+    if MEAL_CACHE_ENABLED:
+        storage = CachedStorage(storage, max_bytes=MEAL_CACHE_MAX_BYTES)
+    atexit.register(storage.close)
+    return storage
+
+
+@cache
+def get_writer() -> GroupCommitWriter:
+    """Return the process-wide group-commit writer for the configured storage."""
+    writer = GroupCommitWriter(
+        get_storage(),
+        max_batch=WRITE_BATCH_MAX,
+        max_wait=WRITE_BATCH_WAIT_MS / 1000,
+    )
+    atexit.register(writer.close)
+    return writer
+
+
+@cache
+def get_async_storage() -> AsyncStorage:
+    """Return the process-wide async facade over the configured storage."""
+    storage = AsyncStorage(get_storage(), max_workers=STORAGE_THREADS)
+    atexit.register(storage.close)
+    return storage
+
+
+__all__ = [
+    "BACKENDS",
+    "DEFAULT_USER",
+    "StorageBackend",
+    "AsyncStorage",
+    "CachedStorage",
+    "JsonlStorage",
+    "SQLiteStorage",
+    "PartitionedStorage",
+    "engine_factory",
+    "GroupCommitWriter",
+    "create_storage",
+    "get_storage",
+    "get_writer",
+    "get_async_storage",
+    "day_range",
+    "make_meal",
+]
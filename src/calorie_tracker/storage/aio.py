@@ -0,0 +1,79 @@
+"""Async facade over a storage engine.
+
+The engines do blocking file/database I/O. ``AsyncStorage`` runs each call
+on a small, bounded thread pool so async tools can await storage without
+stalling the event loop, and so a burst of large reads queues up instead of
+spawning unbounded threads. Iteration happens in the worker thread; callers
+get plain lists back.
+"""
+
+import asyncio
+import functools
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from typing import TypeVar
+
+from .base import DEFAULT_USER, StorageBackend
+
+T = TypeVar("T")
+
+
+class AsyncStorage:
+    """Awaitable storage operations executed on a bounded thread pool."""
+
+    def __init__(self, backend: StorageBackend, max_workers: int = 4):
+        self.backend = backend
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run a blocking callable on the storage pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def add_meals(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> None:
+        await self.run(self.backend.add_meals, list(meals), user)
+
+    def _load(self, user: str, start: datetime | None, end: datetime | None, skip: int, limit: int | None) -> list[dict]:
+        meals = self.backend.iter_meals(user, start, end)
+        try:
+            return list(islice(meals, skip, None if limit is None else skip + limit))
+        finally:
+            meals.close()
+
+    async def load_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        skip: int = 0,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Load a user's meals within [start, end), optionally one slice of them."""
+        return await self.run(self._load, user, start, end, skip, limit)
+
+    async def get_total_calories(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> int:
+        return await self.run(self.backend.get_total_calories, user, start, end)
+
+    async def get_day_total(self, user: str = DEFAULT_USER, day: date | None = None) -> dict:
+        return await self.run(self.backend.get_day_total, user, day)
+
+    async def day_totals(
+        self, user: str = DEFAULT_USER, start: date | None = None, end: date | None = None
+    ) -> list[tuple[date, dict]]:
+        """(day, aggregate) pairs for days with meals in [start, end]."""
+        return await self.run(lambda: list(self.backend.iter_day_totals(user, start, end)))
+
+    async def version(self, user: str = DEFAULT_USER) -> Hashable:
+        return await self.run(self.backend.version, user)
+
+    def close(self) -> None:
+        """Wait for in-flight operations and stop the pool (the backend stays open)."""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,143 @@
+"""Storage backend interface."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Hashable, Iterable, Iterator
+from contextlib import AbstractContextManager, nullcontext
+from datetime import date, datetime, time, timedelta
+
+DEFAULT_USER = "default"
+
+
+def day_range(day: date | None = None) -> tuple[datetime, datetime]:
+    """Return the [start, end) datetimes covering a calendar day (default: today)."""
+    day = day or date.today()
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def empty_day_total() -> dict:
+    """Aggregate for a day with no meals."""
+    return {"calories": 0, "meals": 0, "updated_at": None}
+
+
+def add_to_day_total(total: dict, meal: dict) -> None:
+    """Fold one meal into a day aggregate in place."""
+    total["calories"] += meal["calories"]
+    total["meals"] += 1
+    if total["updated_at"] is None or meal["timestamp"] > total["updated_at"]:
+        total["updated_at"] = meal["timestamp"]
+
+
+def make_meal(food: str, calories: int, timestamp: datetime | None = None) -> dict:
+    """Build a meal record."""
+    return {
+        "food": food,
+        "calories": calories,
+        "timestamp": (timestamp or datetime.now()).isoformat(),
+    }
+
+
+class StorageBackend(ABC):
+    """Base class for meal storage engines.
+
+    Timestamps are stored as naive local ISO-8601 strings, so range filters
+    compare them as strings. Ranges are half-open: ``start <= ts < end``.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def add_meals(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> None:
+        """Persist meals for a user in one write."""
+
+    @abstractmethod
+    def iter_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[dict]:
+        """Yield a user's meals in timestamp order, optionally within [start, end)."""
+
+    @abstractmethod
+    def clear_meals(self, user: str = DEFAULT_USER) -> None:
+        """Delete all meals for a user."""
+
+    def add_meal(self, food: str, calories: int, user: str = DEFAULT_USER) -> dict:
+        """Add a new meal and return it."""
+        meal = make_meal(food, calories)
+        self.add_meals([meal], user)
+        return meal
+
+    def load_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[dict]:
+        """Load a user's meals, optionally within [start, end)."""
+        return list(self.iter_meals(user, start, end))
+
+    def get_total_calories(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> int:
+        """Sum a user's calories, optionally within [start, end)."""
+        return sum(m["calories"] for m in self.iter_meals(user, start, end))
+
+    def get_day_total(self, user: str = DEFAULT_USER, day: date | None = None) -> dict:
+        """Return a user's aggregate for a day (default: today).
+
+        The aggregate is ``{"calories", "meals", "updated_at"}`` where
+        ``updated_at`` is the timestamp of the latest meal that day. Engines
+        maintain it incrementally; this fallback scans the day.
+        """
+        total = empty_day_total()
+        for meal in self.iter_meals(user, *day_range(day)):
+            add_to_day_total(total, meal)
+        return total
+
+    def iter_day_totals(
+        self, user: str = DEFAULT_USER, start: date | None = None, end: date | None = None
+    ) -> Iterator[tuple[date, dict]]:
+        """Yield (day, aggregate) for each day with meals in [start, end], in day order.
+
+        ``end`` is inclusive. This fallback aggregates the meals in the range.
+        """
+        lo = day_range(start)[0] if start else None
+        hi = day_range(end)[1] if end else None
+        days: dict[str, dict] = {}
+        for meal in self.iter_meals(user, lo, hi):
+            add_to_day_total(days.setdefault(meal["timestamp"][:10], empty_day_total()), meal)
+        for day in sorted(days):
+            yield date.fromisoformat(day), days[day]
+
+    def version(self, user: str = DEFAULT_USER) -> Hashable:
+        """Return a token that changes whenever a user's meals change on disk.
+
+        Caches compare it to detect writes made by other processes. ``None``
+        means the engine cannot tell.
+        """
+        return None
+
+    def write_lock(self, user: str = DEFAULT_USER) -> AbstractContextManager:
+        """Context manager excluding writes to a user's meals by other processes.
+
+        Held around the engine's own writes, and by callers that must read the
+        version, write and read it again without another writer slipping in.
+        Re-entrant within a thread. The default is a no-op.
+        """
+        return nullcontext()
+
+    def disk_usage(self, user: str = DEFAULT_USER) -> int:
+        """Bytes on disk used by the files holding a user's meals."""
+        return 0
+
+    def tenant_stats(self) -> dict[str, dict]:
+        """Per-user storage size stats (only partitioned storage tracks these)."""
+        return {}
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
@@ -0,0 +1,208 @@
+"""Storage micro-benchmarks.
+
+Times ``add_meal``, ``load_meals`` and ``get_total_calories`` on every
+storage engine against synthetic histories (default: 1k, 100k and 1M
+meals). For each operation it records:
+
+- wall time (best of ``--repeat`` runs, without tracing)
+- peak memory allocated during one traced run (tracemalloc)
+- bytes written (write syscalls from ``/proc/self/io``, else growth of the
+  engine's files)
+
+Reads are measured over the whole history and over a single day, which is
+what the server's tools do. Results can be saved as a baseline and a later
+run compared against it; the run exits non-zero when an operation got
+slower or hungrier than ``--threshold`` allows.
+
+Examples:
+    calorie-storage-bench --sizes 1000,100000 --save bench/baseline.json
+    calorie-storage-bench --sizes 1000,100000 --compare bench/baseline.json
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from ..benchmarking import compare_with_baseline, format_table, make_report, save_baseline
+from . import BACKENDS, engine_factory
+from .base import DEFAULT_USER, StorageBackend, day_range, make_meal
+
+DEFAULT_SIZES = "1000,100000,1000000"
+MEALS_PER_DAY = 5
+SEED_BATCH = 10_000
+MIN_RUN_S = 0.05
+FOODS = ["Oatmeal", "Banana", "Chicken salad", "Rice bowl", "Apple", "Pasta", "Yogurt", "Steak"]
+
+
+def bytes_written() -> int | None:
+    """Bytes this process has passed to write syscalls (Linux only)."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def synthetic_history(size: int, seed: int = 0):
+    """Yield ``size`` meals, MEALS_PER_DAY a day, ending yesterday, in time order."""
+    rng = random.Random(seed)
+    days = -(-size // MEALS_PER_DAY)
+    first = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+    for i in range(size):
+        day, slot = divmod(i, MEALS_PER_DAY)
+        ts = first + timedelta(days=day, hours=7 + 3 * slot, minutes=rng.randrange(60))
+        yield make_meal(rng.choice(FOODS), rng.randrange(50, 900), ts)
+
+
+def seed(storage: StorageBackend, size: int, user: str = DEFAULT_USER) -> None:
+    """Fill a user's storage with a synthetic history in large batches."""
+    batch = []
+    for meal in synthetic_history(size):
+        batch.append(meal)
+        if len(batch) == SEED_BATCH:
+            storage.add_meals(batch, user)
+            batch = []
+    if batch:
+        storage.add_meals(batch, user)
+
+
+def measure(
+    fn: Callable[[], object], storage: StorageBackend, repeat: int, ops: int = 1, loop: bool = True
+) -> dict:
+    """Time ``fn`` (best of ``repeat``), then trace one run for memory and bytes.
+
+    ``ops`` is the number of operations one call of ``fn`` performs; times
+    and bytes are reported per operation. With ``loop``, fast calls are
+    repeated until a timed run lasts at least MIN_RUN_S so that sub-millisecond
+    reads are not dominated by timer noise.
+    """
+    start = time.perf_counter()
+    fn()
+    loops = max(1, int(MIN_RUN_S / max(time.perf_counter() - start, 1e-9))) if loop else 1
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+
+    written_before, usage_before = bytes_written(), storage.disk_usage()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    written_after = bytes_written()
+    if written_before is not None and written_after is not None:
+        written = written_after - written_before
+    else:
+        written = max(0, storage.disk_usage() - usage_before)
+    return {
+        "wall_ms": round(best / ops * 1000, 4),
+        "peak_kib": round(peak / 1024, 1),
+        "bytes_written": round(written / ops),
+    }
+
+
+def bench_engine(backend: str, size: int, repeat: int, appends: int) -> dict[str, dict]:
+    """Run every operation for one engine and history size."""
+    with tempfile.TemporaryDirectory(prefix=f"bench-{backend}-") as tmp:
+        storage = engine_factory(backend)(Path(tmp))
+        try:
+            start = time.perf_counter()
+            seed(storage, size)
+            seed_s = time.perf_counter() - start
+            yesterday = day_range(date.today() - timedelta(days=1))
+
+            def add_meals_one_by_one():
+                for i in range(appends):
+                    storage.add_meal("Benchmark snack", 100 + i % 50, DEFAULT_USER)
+
+            results = {
+                "add_meal": measure(add_meals_one_by_one, storage, repeat, ops=appends, loop=False),
+                "load_meals[all]": measure(lambda: storage.load_meals(), storage, repeat),
+                "load_meals[day]": measure(lambda: storage.load_meals(DEFAULT_USER, *yesterday), storage, repeat),
+                "get_total_calories[all]": measure(lambda: storage.get_total_calories(), storage, repeat),
+                "get_total_calories[day]": measure(
+                    lambda: storage.get_total_calories(DEFAULT_USER, *yesterday), storage, repeat
+                ),
+            }
+            results["seed"] = {"wall_ms": round(seed_s * 1000, 1), "disk_bytes": storage.disk_usage()}
+            return results
+        finally:
+            storage.close()
+
+
+def run(backends: list[str], sizes: list[int], repeat: int, appends: int) -> dict:
+    """Benchmark every (engine, size) pair; returns the report dict."""
+    results: dict[str, dict] = {}
+    for backend in backends:
+        for size in sizes:
+            print(f"  {backend} @ {size:,} meals ...", file=sys.stderr, flush=True)
+            results[f"{backend}/{size}"] = bench_engine(backend, size, repeat, appends)
+    return make_report(results, repeat=repeat, appends=appends)
+
+
+def cases(report: dict) -> dict[str, dict]:
+    """Flatten a report into one case per (engine/size, operation)."""
+    return {
+        f"{case} {op}": stats
+        for case, ops in report.get("results", {}).items()
+        for op, stats in ops.items()
+        if op != "seed"
+    }
+
+
+COLUMNS = [
+    ("wall ms", ">12", lambda stats: f"{stats['wall_ms']:g}"),
+    ("peak KiB", ">12", lambda stats: f"{stats['peak_kib']:g}"),
+    ("bytes written", ">14", lambda stats: f"{stats['bytes_written']:,}"),
+]
+COMPARED = {"wall_ms": "wall ms", "peak_kib": "peak KiB"}
+
+
+def format_report(report: dict) -> list[str]:
+    return format_table(cases(report), COLUMNS)
+
+
+def main():
+    """Run the storage benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark the meal storage engines")
+    parser.add_argument("--engines", default=",".join(BACKENDS), help="comma-separated engines")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated history sizes")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per operation (best is kept)")
+    parser.add_argument("--appends", type=int, default=100, help="meals appended per add_meal run")
+    parser.add_argument("--save", help="write the results to this baseline file")
+    parser.add_argument("--compare", help="diff the results against this baseline file")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="ratio above baseline that counts as a regression (default: 1.5)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="ignore wall-time changes smaller than this (default: 0.05)")
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.engines.split(",")]
+    sizes = [int(s) for s in args.sizes.split(",")]
+    report = run(backends, sizes, args.repeat, args.appends)
+    print("\n".join(format_report(report)))
+
+    if args.save:
+        save_baseline(report, args.save)
+
+    if args.compare and compare_with_baseline(
+        report, args.compare, cases, COMPARED, args.threshold, args.min_delta_ms, time_key="wall_ms"
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
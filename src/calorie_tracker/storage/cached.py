@@ -0,0 +1,239 @@
+"""In-process write-through meal cache.
+
+Wraps any storage engine and keeps recently used (user, day) buckets of
+meals in memory. Writes go to the engine first and are then applied to the
+cached buckets, so the process never has to re-read what it just wrote.
+
+Writes from other processes are detected through the engine's ``version()``
+token (file mtime/size for JSONL, a generation counter for SQLite). When the
+token moves, the user's cached days are dropped and reloaded on demand. A
+write holds the engine's ``write_lock`` from the version check before it to
+the one after it, so another process's write can never hide inside ours.
+Buckets are evicted least-recently-used first once the estimated size of the
+cache exceeds ``max_bytes``. Day aggregates are cached alongside (capped at
+``max_totals`` entries) and updated in place on write.
+
+Locking is per user: engine I/O (a miss, a write and its fsync) holds only
+that user's lock, so one user's slow write never stalls another user's
+reads. The shared lock guards the dictionaries and LRU order and is never
+held across I/O. Lock order: user lock, engine write lock, shared lock.
+"""
+
+import sys
+import threading
+from bisect import insort
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from datetime import date, datetime, time
+
+from .base import DEFAULT_USER, StorageBackend, add_to_day_total, day_range
+
+
+def _meal_size(meal: dict) -> int:
+    """Rough in-memory size of a cached meal record."""
+    return sys.getsizeof(meal) + sum(sys.getsizeof(v) for v in meal.values())
+
+
+def _timestamp(meal: dict) -> str:
+    return meal["timestamp"]
+
+
+def _single_day(start: datetime | None, end: datetime | None) -> date | None:
+    """Return the day if [start, end) lies within one calendar day."""
+    if start is None or end is None:
+        return None
+    day = start.date()
+    day_end = day_range(day)[1]
+    return day if end <= day_end else None
+
+
+class CachedStorage(StorageBackend):
+    """Write-through cache in front of another storage engine."""
+
+    def __init__(self, backend: StorageBackend, max_bytes: int, max_totals: int = 10_000):
+        self.backend = backend
+        self.name = backend.name
+        self.max_bytes = max_bytes
+        self.max_totals = max_totals
+        self.hits = 0
+        self.misses = 0
+        self._days: OrderedDict[tuple[str, date], list[dict]] = OrderedDict()
+        self._sizes: dict[tuple[str, date], int] = {}
+        self._totals: OrderedDict[tuple[str, date], dict] = OrderedDict()
+        self._versions: dict[str, Hashable] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()  # bookkeeping only, never held across I/O
+        self._user_locks: dict[str, threading.RLock] = {}
+
+    # -- bookkeeping ---------------------------------------------------------
+
+    def _user_lock(self, user: str) -> "threading.RLock":
+        with self._lock:
+            lock = self._user_locks.get(user)
+            if lock is None:
+                lock = self._user_locks[user] = threading.RLock()
+            return lock
+
+    def _drop(self, key: tuple[str, date]) -> None:
+        self._days.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _invalidate_user(self, user: str) -> None:
+        for key in [k for k in self._days if k[0] == user]:
+            self._drop(key)
+        for key in [k for k in self._totals if k[0] == user]:
+            del self._totals[key]
+        self._versions.pop(user, None)
+
+    def _check_version(self, user: str) -> None:
+        """Drop a user's cached days if another process has written (hold the user lock)."""
+        current = self.backend.version(user)
+        with self._lock:
+            if user in self._versions and self._versions[user] != current:
+                self._invalidate_user(user)
+            self._versions[user] = current
+
+    def _evict(self) -> None:
+        """Evict cold days until the cache fits in max_bytes (keeps the newest)."""
+        while self._bytes > self.max_bytes and len(self._days) > 1:
+            key, _ = self._days.popitem(last=False)
+            self._bytes -= self._sizes.pop(key, 0)
+        while len(self._totals) > self.max_totals:
+            self._totals.popitem(last=False)
+
+    def _load_day(self, user: str, day: date) -> list[dict]:
+        """Return a user's meals for a day, loading them on a miss."""
+        key = (user, day)
+        with self._user_lock(user):
+            self._check_version(user)
+            with self._lock:
+                if key in self._days:
+                    self.hits += 1
+                    self._days.move_to_end(key)
+                    return list(self._days[key])
+                self.misses += 1
+
+            meals = self.backend.load_meals(user, *day_range(day))
+            with self._lock:
+                self._days[key] = meals
+                self._sizes[key] = sum(_meal_size(m) for m in meals)
+                self._bytes += self._sizes[key]
+                self._evict()
+                return list(meals)
+
+    # -- StorageBackend ------------------------------------------------------
+
+    def add_meals(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> None:
+        """Write meals through to the engine, then update cached days."""
+        meals = list(meals)
+        with self._user_lock(user), self.backend.write_lock(user):
+            before = self.backend.version(user)
+            self.backend.add_meals(meals, user)
+            after = self.backend.version(user)
+            self._apply(user, meals, before, after)
+
+    def _apply(self, user: str, meals: list[dict], before: Hashable, after: Hashable) -> None:
+        """Update cached days and totals after a write."""
+        with self._lock:
+            if self._versions.get(user, before) != before:
+                # Someone else wrote since we last looked; start over
+                self._invalidate_user(user)
+                return
+            self._versions[user] = after
+
+            for meal in meals:
+                key = (user, datetime.fromisoformat(meal["timestamp"]).date())
+                if key in self._days:
+                    # Keep the day in timestamp order (meals can be back-dated)
+                    insort(self._days[key], dict(meal), key=_timestamp)
+                    size = _meal_size(meal)
+                    self._sizes[key] += size
+                    self._bytes += size
+                if key in self._totals:
+                    add_to_day_total(self._totals[key], meal)
+            self._evict()
+
+    def iter_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[dict]:
+        """Serve single-day ranges from the cache; pass anything else through."""
+        day = _single_day(start, end)
+        if day is None:
+            yield from self.backend.iter_meals(user, start, end)
+            return
+
+        lo, hi = start.isoformat(), end.isoformat()
+        whole_day = start.time() == time.min and end == day_range(day)[1]
+        for meal in self._load_day(user, day):
+            if whole_day or lo <= meal["timestamp"] < hi:
+                yield dict(meal)
+
+    def get_day_total(self, user: str = DEFAULT_USER, day: date | None = None) -> dict:
+        """Return a user's day aggregate, asking the engine only on a miss."""
+        key = (user, day or date.today())
+        with self._user_lock(user):
+            self._check_version(user)
+            with self._lock:
+                if key in self._totals:
+                    self.hits += 1
+                    self._totals.move_to_end(key)
+                    return dict(self._totals[key])
+                self.misses += 1
+
+            total = self.backend.get_day_total(user, key[1])
+            with self._lock:
+                self._totals[key] = total
+                self._evict()
+                return dict(total)
+
+    def iter_day_totals(
+        self, user: str = DEFAULT_USER, start: date | None = None, end: date | None = None
+    ) -> Iterator[tuple[date, dict]]:
+        return self.backend.iter_day_totals(user, start, end)
+
+    def clear_meals(self, user: str = DEFAULT_USER) -> None:
+        """Delete all meals for a user and forget their cached days."""
+        with self._user_lock(user):
+            self.backend.clear_meals(user)
+            with self._lock:
+                self._invalidate_user(user)
+
+    def version(self, user: str = DEFAULT_USER) -> Hashable:
+        return self.backend.version(user)
+
+    @contextmanager
+    def write_lock(self, user: str = DEFAULT_USER) -> Iterator[None]:
+        """The engine's write lock, taken after the user's lock (the order add_meals uses)."""
+        with self._user_lock(user), self.backend.write_lock(user):
+            yield
+
+    def disk_usage(self, user: str = DEFAULT_USER) -> int:
+        return self.backend.disk_usage(user)
+
+    def tenant_stats(self) -> dict[str, dict]:
+        return self.backend.tenant_stats()
+
+    def close(self) -> None:
+        with self._lock:
+            self._days.clear()
+            self._sizes.clear()
+            self._totals.clear()
+            self._versions.clear()
+            self._bytes = 0
+        self.backend.close()
+
+    def stats(self) -> dict:
+        """Return cache hit/miss counters and current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "days": len(self._days),
+                "totals": len(self._totals),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,355 @@
+"""Append-only JSON Lines storage engine.
+
+Meals are kept in an append-only log (one meal per line). Logging a meal is
+a single append + fsync, and readers stream the log line by line. A legacy
+``meals.json`` array is migrated into the log on first use.
+
+Per-(user, day) totals are kept in memory and advanced by replaying only the
+bytes appended to the log since they were last brought up to date, which
+also picks up appends from other processes. They are snapshotted to
+``meals.totals.json`` together with the log offset they cover, so a restart
+only replays the tail of the log.
+
+Time-range reads use an in-memory index of (timestamp, byte offset) pairs
+kept sorted by timestamp. It is built on the first range query and then
+advanced the same way as the totals, so a range costs two bisects plus one
+seek per matching meal: O(log n + k).
+
+Several processes may share a log. Appends, the legacy migration and
+rewrites hold an exclusive lock on ``meals.lock`` (see ``locking.py``);
+readers need no lock because they only consume complete lines and notice
+rewrites through the log's inode.
+"""
+
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime
+from pathlib import Path
+
+from ..metrics import STORAGE_BYTES
+from .base import DEFAULT_USER, StorageBackend, add_to_day_total, empty_day_total
+from .locking import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlStorage(StorageBackend):
+    """Stores meals in an append-only JSONL file."""
+
+    name = "jsonl"
+
+    def __init__(
+        self,
+        log_file: Path,
+        legacy_file: Path | None = None,
+        snapshot_every: int = 100,
+    ):
+        self.log_file = log_file
+        self.legacy_file = legacy_file
+        self.totals_file = log_file.with_suffix(".totals.json")
+        self.snapshot_every = snapshot_every
+        self._totals: dict[str, dict[str, dict]] | None = None
+        self._totals_inode: int | None = None
+        self._totals_offset = 0
+        self._unsnapshotted = 0
+        self._index_ts: list[str] | None = None
+        self._index_pos: list[int] = []
+        self._index_inode: int | None = None
+        self._index_offset = 0
+        self._index_in_log_order = True
+        self._lock = threading.RLock()
+        # Shares _lock so in-process callers always take it before the flock
+        self._write_lock = FileLock(log_file.with_suffix(".lock"), self._lock)
+
+    def ensure_data_dir(self) -> None:
+        """Ensure data directory exists."""
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def migrate_legacy_meals(self) -> int:
+        """Move meals from the legacy meals.json into the JSONL log.
+
+        Legacy meals are written ahead of anything already in the log, the log
+        is swapped in atomically, and meals.json is renamed to meals.json.bak
+        so the migration only ever runs once. Returns the number of meals
+        migrated.
+        """
+        if not self.legacy_file or not self.legacy_file.exists():
+            return 0
+        with self._write_lock:
+            if not self.legacy_file.exists():
+                return 0  # another process migrated it while we waited
+            return self._migrate_legacy_meals()
+
+    def _migrate_legacy_meals(self) -> int:
+        self.ensure_data_dir()
+        legacy = json.loads(self.legacy_file.read_text() or "[]")
+        tmp_file = self.log_file.with_suffix(".jsonl.tmp")
+        with tmp_file.open("w") as f:
+            for meal in legacy:
+                f.write(json.dumps(meal) + "\n")
+            if self.log_file.exists():
+                with self.log_file.open() as log:
+                    for line in log:
+                        f.write(line if line.endswith("\n") else line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.log_file)
+        self.legacy_file.rename(self.legacy_file.with_suffix(".json.bak"))
+
+        logger.info("Migrated %d meals from %s to %s", len(legacy), self.legacy_file.name, self.log_file.name)
+        return len(legacy)
+
+    def _iter_log(self) -> Iterator[dict]:
+        """Stream every record in the log."""
+        self.migrate_legacy_meals()
+        if not self.log_file.exists():
+            return
+
+        with self.log_file.open() as f:
+            for line_no, line in enumerate(f, 1):
+                STORAGE_BYTES.inc(len(line), direction="read")
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append; skip it
+                    logger.warning("Skipping unreadable line %d in %s", line_no, self.log_file.name)
+
+    def _scan_from(self, offset: int) -> Iterator[tuple[int, int, dict]]:
+        """Yield (line offset, next offset, record) for complete lines past offset."""
+        with self.log_file.open("rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return  # partial append in progress; pick it up next time
+                next_offset = offset + len(line)
+                STORAGE_BYTES.inc(len(line), direction="read")
+                try:
+                    yield offset, next_offset, json.loads(line)
+                except json.JSONDecodeError:
+                    yield offset, next_offset, None
+                offset = next_offset
+
+    def iter_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[dict]:
+        """Yield a user's meals; ranges use the timestamp index, otherwise stream the log.
+
+        A log holding back-dated meals is not in timestamp order, so full
+        reads of it go through the index too.
+        """
+        with self._lock:
+            self._refresh_index()
+            stream = start is None and end is None and self._index_in_log_order
+            if not stream:
+                lo = bisect_left(self._index_ts, start.isoformat()) if start else 0
+                hi = bisect_left(self._index_ts, end.isoformat()) if end else len(self._index_ts)
+                positions = self._index_pos[lo:hi]
+                if not positions:
+                    return
+                # Opened under the lock so a concurrent rewrite can't swap the file
+                # out from under the offsets we just looked up
+                f = self.log_file.open("rb")
+
+        if stream:
+            for meal in self._iter_log():
+                if meal.pop("user", DEFAULT_USER) == user:
+                    yield meal
+            return
+
+        with f:
+            for pos in positions:
+                f.seek(pos)
+                line = f.readline()
+                STORAGE_BYTES.inc(len(line), direction="read")
+                meal = json.loads(line)
+                if meal.pop("user", DEFAULT_USER) == user:
+                    yield meal
+
+    def _refresh_index(self) -> None:
+        """Bring the sorted timestamp index up to date with the log."""
+        self.migrate_legacy_meals()
+        try:
+            st = self.log_file.stat()
+        except FileNotFoundError:
+            self._index_ts, self._index_pos, self._index_inode, self._index_offset = [], [], None, 0
+            self._index_in_log_order = True
+            return
+
+        if (
+            self._index_ts is None
+            or st.st_ino != self._index_inode
+            or st.st_size < self._index_offset
+        ):
+            self._index_ts, self._index_pos, self._index_inode, self._index_offset = [], [], st.st_ino, 0
+            self._index_in_log_order = True
+        if st.st_size == self._index_offset:
+            return
+
+        for pos, self._index_offset, meal in self._scan_from(self._index_offset):
+            if meal is None:
+                continue
+            ts = meal["timestamp"]
+            if not self._index_ts or ts >= self._index_ts[-1]:
+                self._index_ts.append(ts)
+                self._index_pos.append(pos)
+            else:
+                # Back-dated meal: keep both lists sorted by timestamp
+                i = bisect_left(self._index_ts, ts)
+                self._index_ts.insert(i, ts)
+                self._index_pos.insert(i, pos)
+                self._index_in_log_order = False
+
+    def add_meals(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> None:
+        """Append meals to the log with a single write and fsync."""
+        payload = "".join(json.dumps({**meal, "user": user}) + "\n" for meal in meals).encode()
+        if not payload:
+            return
+
+        with self._write_lock:
+            self.migrate_legacy_meals()
+            self.ensure_data_dir()
+            with self.log_file.open("ab+") as f:
+                end = f.seek(0, os.SEEK_END)
+                if end:
+                    f.seek(end - 1)
+                    if f.read(1) != b"\n":
+                        # A crash tore the last append: end that line (readers
+                        # skip it) so our first meal isn't glued onto it
+                        payload = b"\n" + payload
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            STORAGE_BYTES.inc(len(payload), direction="written")
+
+            self._unsnapshotted += self._refresh_totals()
+            if self._unsnapshotted >= self.snapshot_every:
+                self._save_totals_snapshot()
+
+    # -- per-day totals ------------------------------------------------------
+
+    def _load_totals_snapshot(self, inode: int, size: int) -> None:
+        """Start from the on-disk snapshot if it matches the current log."""
+        self._totals, self._totals_inode, self._totals_offset = {}, inode, 0
+        try:
+            snapshot = json.loads(self.totals_file.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if snapshot.get("inode") == inode and snapshot.get("offset", 0) <= size:
+            self._totals = snapshot["totals"]
+            self._totals_offset = snapshot["offset"]
+
+    def _save_totals_snapshot(self) -> None:
+        """Persist totals and the log offset they cover (atomic rewrite)."""
+        tmp_file = self.totals_file.with_suffix(f".json.{os.getpid()}.tmp")  # one per process
+        written = tmp_file.write_text(json.dumps({
+            "inode": self._totals_inode,
+            "offset": self._totals_offset,
+            "totals": self._totals,
+        }))
+        STORAGE_BYTES.inc(written, direction="written")
+        os.replace(tmp_file, self.totals_file)
+        self._unsnapshotted = 0
+
+    def _refresh_totals(self) -> int:
+        """Fold any log lines past the covered offset into the totals.
+
+        Returns the number of meals applied. A replaced or truncated log
+        (migration, clear) resets the totals and replays it from the start.
+        """
+        self.migrate_legacy_meals()
+        try:
+            st = self.log_file.stat()
+        except FileNotFoundError:
+            self._totals, self._totals_inode, self._totals_offset = {}, None, 0
+            return 0
+
+        if self._totals is None:
+            self._load_totals_snapshot(st.st_ino, st.st_size)
+        elif st.st_ino != self._totals_inode or st.st_size < self._totals_offset:
+            self._totals, self._totals_inode, self._totals_offset = {}, st.st_ino, 0
+        if st.st_size == self._totals_offset:
+            return 0
+
+        applied = 0
+        for _, self._totals_offset, meal in self._scan_from(self._totals_offset):
+            if meal is None:
+                continue
+            days = self._totals.setdefault(meal.get("user", DEFAULT_USER), {})
+            add_to_day_total(days.setdefault(meal["timestamp"][:10], empty_day_total()), meal)
+            applied += 1
+        return applied
+
+    def get_day_total(self, user: str = DEFAULT_USER, day: date | None = None) -> dict:
+        """Look up a user's day aggregate from the in-memory totals."""
+        day_key = (day or date.today()).isoformat()
+        with self._lock:
+            self._refresh_totals()
+            total = self._totals.get(user, {}).get(day_key)
+            return dict(total) if total else empty_day_total()
+
+    def iter_day_totals(
+        self, user: str = DEFAULT_USER, start: date | None = None, end: date | None = None
+    ) -> Iterator[tuple[date, dict]]:
+        """Yield day aggregates in [start, end] from the in-memory totals."""
+        lo = start.isoformat() if start else ""
+        hi = end.isoformat() if end else "9999-12-31"
+        with self._lock:
+            self._refresh_totals()
+            days = [
+                (day, dict(total))
+                for day, total in self._totals.get(user, {}).items()
+                if lo <= day <= hi
+            ]
+        for day, total in sorted(days):
+            yield date.fromisoformat(day), total
+
+    def version(self, user: str = DEFAULT_USER) -> tuple[int, int, int] | None:
+        """Identify the log by inode, size and mtime; any append changes it."""
+        try:
+            st = self.log_file.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def write_lock(self, user: str = DEFAULT_USER) -> FileLock:
+        """Lock excluding appends and rewrites from other threads and processes."""
+        return self._write_lock
+
+    def disk_usage(self, user: str = DEFAULT_USER) -> int:
+        """Size of the log and its totals snapshot."""
+        return sum(f.stat().st_size for f in (self.log_file, self.totals_file) if f.exists())
+
+    def _rewrite(self, records: Iterable[dict]) -> None:
+        """Replace the whole log with the given records (atomic rewrite)."""
+        self.ensure_data_dir()
+        tmp_file = self.log_file.with_suffix(".jsonl.tmp")
+        with tmp_file.open("w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.log_file)
+
+    def clear_meals(self, user: str = DEFAULT_USER) -> None:
+        """Delete all meals for a user (rewrites the log)."""
+        with self._write_lock:
+            kept = [m for m in self._iter_log() if m.get("user", DEFAULT_USER) != user]
+            self._rewrite(kept)
+            self._refresh_totals()
+            self._save_totals_snapshot()
+
+    def close(self) -> None:
+        """Snapshot the totals so the next start replays as little as possible."""
+        with self._lock:
+            if self._totals is not None and self._unsnapshotted:
+                self._save_totals_snapshot()
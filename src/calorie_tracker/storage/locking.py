@@ -0,0 +1,57 @@
+"""Inter-process write locks for storage files.
+
+With several server workers sharing a data directory, appends, rewrites
+and the cache's "did anyone else write?" checks must be serialized across
+processes, not just threads. ``FileLock`` pairs an in-process re-entrant
+lock with an exclusive ``fcntl.flock`` on a sidecar ``.lock`` file. The
+flock is taken once per outermost acquisition, so nested use in the same
+thread is cheap and cannot self-deadlock.
+
+On platforms without ``fcntl`` (Windows) only the in-process lock is taken;
+run a single worker there.
+"""
+
+import os
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class FileLock:
+    """Re-entrant lock held across threads and processes."""
+
+    def __init__(self, path: Path, thread_lock: "threading.RLock | None" = None):
+        self.path = path
+        self._thread_lock = thread_lock or threading.RLock()
+        self._depth = 0
+        self._fd: int | None = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0 and fcntl is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                self._fd = fd
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
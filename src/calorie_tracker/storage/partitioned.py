@@ -0,0 +1,164 @@
+"""Per-user storage partitions.
+
+Every user gets their own engine instance backed by its own files (a JSONL
+log or a SQLite database), so one user's history size and write rate never
+affect another user's reads and writes. The default (unauthenticated) user
+keeps the original files directly in ``DATA_DIR``; everybody else lives
+under ``DATA_DIR/users/<partition>/``.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from contextlib import AbstractContextManager
+from datetime import date, datetime
+from pathlib import Path
+
+from ..metrics import STORAGE_LATENCY
+from .base import DEFAULT_USER, StorageBackend
+
+OWNER_FILE = "partition.json"
+
+
+def partition_name(user: str) -> str:
+    """Filesystem-safe, collision-free directory name for a user id."""
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", user)[:40]
+    digest = hashlib.sha256(user.encode()).hexdigest()[:12]
+    return f"{safe}-{digest}"
+
+
+class PartitionedStorage(StorageBackend):
+    """Routes each user to a dedicated engine created by ``factory``."""
+
+    def __init__(
+        self,
+        factory: Callable[[Path], StorageBackend],
+        root: Path,
+        users_dir: Path,
+    ):
+        self.factory = factory
+        self.root = root
+        self.users_dir = users_dir
+        self._partitions: dict[str, StorageBackend] = {}
+        self._lock = threading.Lock()
+        self.name = self.partition(DEFAULT_USER).name
+
+    def partition_dir(self, user: str) -> Path:
+        """Directory holding a user's files."""
+        if user == DEFAULT_USER:
+            return self.root
+        return self.users_dir / partition_name(user)
+
+    def partition(self, user: str) -> StorageBackend:
+        """Return the engine for a user's partition, creating it on first use."""
+        engine = self._partitions.get(user)
+        if engine is not None:
+            return engine
+
+        with self._lock:
+            if user not in self._partitions:
+                directory = self.partition_dir(user)
+                if user != DEFAULT_USER:
+                    directory.mkdir(parents=True, exist_ok=True)
+                    owner = directory / OWNER_FILE
+                    if not owner.exists():
+                        owner.write_text(json.dumps({"user": user}))
+                self._partitions[user] = self.factory(directory)
+            return self._partitions[user]
+
+    def add_meals(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> None:
+        started = time.perf_counter()
+        try:
+            self.partition(user).add_meals(meals, user)
+        finally:
+            STORAGE_LATENCY.observe(time.perf_counter() - started, op="save")
+
+    def iter_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[dict]:
+        # Time spent producing rows, excluding time the consumer holds each one
+        meals = self.partition(user).iter_meals(user, start, end)
+        elapsed = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    meal = next(meals)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - started
+                yield meal
+        finally:
+            STORAGE_LATENCY.observe(elapsed, op="load")
+
+    def get_total_calories(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> int:
+        return self.partition(user).get_total_calories(user, start, end)
+
+    def get_day_total(self, user: str = DEFAULT_USER, day: date | None = None) -> dict:
+        started = time.perf_counter()
+        try:
+            return self.partition(user).get_day_total(user, day)
+        finally:
+            STORAGE_LATENCY.observe(time.perf_counter() - started, op="day_total")
+
+    def iter_day_totals(
+        self, user: str = DEFAULT_USER, start: date | None = None, end: date | None = None
+    ) -> Iterator[tuple[date, dict]]:
+        return self.partition(user).iter_day_totals(user, start, end)
+
+    def clear_meals(self, user: str = DEFAULT_USER) -> None:
+        self.partition(user).clear_meals(user)
+
+    def version(self, user: str = DEFAULT_USER) -> Hashable:
+        return self.partition(user).version(user)
+
+    def write_lock(self, user: str = DEFAULT_USER) -> AbstractContextManager:
+        return self.partition(user).write_lock(user)
+
+    def disk_usage(self, user: str = DEFAULT_USER) -> int:
+        return self.partition(user).disk_usage(user)
+
+    def known_users(self) -> list[str]:
+        """Users with a partition on disk (plus any opened in this process).
+
+        The default user's partition is always open, so it counts only once it
+        has data.
+        """
+        users = set(self._partitions) - {DEFAULT_USER}
+        if self.partition(DEFAULT_USER).disk_usage():
+            users.add(DEFAULT_USER)
+        if self.users_dir.exists():
+            for owner in self.users_dir.glob(f"*/{OWNER_FILE}"):
+                try:
+                    users.add(json.loads(owner.read_text())["user"])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+        return sorted(users)
+
+    def tenant_stats(self) -> dict[str, dict]:
+        """Per-user partition location and on-disk size in bytes."""
+        return {
+            user: {
+                "path": str(self.partition_dir(user)),
+                "bytes": self.disk_usage(user),
+            }
+            for user in self.known_users()
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for engine in self._partitions.values():
+                engine.close()
+            self._partitions.clear()
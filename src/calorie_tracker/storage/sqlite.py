@@ -0,0 +1,199 @@
+"""SQLite storage engine.
+
+Uses the stdlib ``sqlite3`` module in WAL mode with an index on
+``(user, timestamp)``, so summaries are indexed range queries instead of
+full scans. Per-(user, day) totals live in ``daily_totals`` and are upserted
+in the same transaction as the meals they count.
+
+SQLite already serializes concurrent writers from several processes. Writes
+also hold ``meals.db.lock`` (see ``locking.py``) so that a cache in another
+process can bracket its own write with version checks.
+"""
+
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime
+from pathlib import Path
+
+from .base import DEFAULT_USER, StorageBackend, empty_day_total
+from .locking import FileLock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    food TEXT NOT NULL,
+    calories INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_meals_user_timestamp ON meals (user, timestamp);
+CREATE TABLE IF NOT EXISTS generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO generation (id, value) VALUES (1, 0);
+CREATE TABLE IF NOT EXISTS daily_totals (
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    calories INTEGER NOT NULL,
+    meals INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (user, day)
+);
+"""
+
+# Fill daily_totals for databases created before the table existed
+BACKFILL_TOTALS = """
+INSERT INTO daily_totals (user, day, calories, meals, updated_at)
+SELECT user, substr(timestamp, 1, 10), SUM(calories), COUNT(*), MAX(timestamp)
+FROM meals
+WHERE NOT EXISTS (SELECT 1 FROM daily_totals)
+GROUP BY user, substr(timestamp, 1, 10)
+"""
+
+UPSERT_TOTAL = """
+INSERT INTO daily_totals (user, day, calories, meals, updated_at)
+VALUES (?, ?, ?, 1, ?)
+ON CONFLICT (user, day) DO UPDATE SET
+    calories = calories + excluded.calories,
+    meals = meals + 1,
+    updated_at = MAX(updated_at, excluded.updated_at)
+"""
+
+
+class SQLiteStorage(StorageBackend):
+    """Stores meals in a SQLite database (one connection per thread)."""
+
+    name = "sqlite"
+
+    def __init__(self, db_file: Path):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._write_lock = FileLock(db_file.with_name(db_file.name + ".lock"))
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            with conn:
+                conn.execute(BACKFILL_TOTALS)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _where(user: str, start: datetime | None, end: datetime | None) -> tuple[str, list]:
+        """Build the WHERE clause for a user/time-range query."""
+        clauses, params = ["user = ?"], [user]
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start.isoformat())
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end.isoformat())
+        return " AND ".join(clauses), params
+
+    def add_meals(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> None:
+        """Insert meals in a single transaction."""
+        rows = [(user, m["food"], m["calories"], m["timestamp"]) for m in meals]
+        if not rows:
+            return
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.executemany(
+                "INSERT INTO meals (user, food, calories, timestamp) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany(
+                UPSERT_TOTAL,
+                [(user, ts[:10], calories, ts) for user, _, calories, ts in rows],
+            )
+            conn.execute("UPDATE generation SET value = value + 1 WHERE id = 1")
+
+    def iter_meals(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[dict]:
+        """Yield a user's meals in timestamp order via the (user, timestamp) index."""
+        where, params = self._where(user, start, end)
+        cursor = self._connect().execute(
+            f"SELECT food, calories, timestamp FROM meals WHERE {where} ORDER BY timestamp, id",
+            params,
+        )
+        for row in cursor:
+            yield dict(row)
+
+    def get_total_calories(
+        self,
+        user: str = DEFAULT_USER,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> int:
+        """Sum a user's calories with an indexed range query."""
+        where, params = self._where(user, start, end)
+        row = self._connect().execute(
+            f"SELECT COALESCE(SUM(calories), 0) FROM meals WHERE {where}", params
+        ).fetchone()
+        return row[0]
+
+    def get_day_total(self, user: str = DEFAULT_USER, day: date | None = None) -> dict:
+        """Look up a user's day aggregate by primary key."""
+        row = self._connect().execute(
+            "SELECT calories, meals, updated_at FROM daily_totals WHERE user = ? AND day = ?",
+            (user, (day or date.today()).isoformat()),
+        ).fetchone()
+        return dict(row) if row else empty_day_total()
+
+    def iter_day_totals(
+        self, user: str = DEFAULT_USER, start: date | None = None, end: date | None = None
+    ) -> Iterator[tuple[date, dict]]:
+        """Yield day aggregates in [start, end] with a primary-key range scan."""
+        cursor = self._connect().execute(
+            "SELECT day, calories, meals, updated_at FROM daily_totals"
+            " WHERE user = ? AND day >= ? AND day <= ? ORDER BY day",
+            (user, start.isoformat() if start else "", end.isoformat() if end else "9999-12-31"),
+        )
+        for row in cursor:
+            total = dict(row)
+            yield date.fromisoformat(total.pop("day")), total
+
+    def clear_meals(self, user: str = DEFAULT_USER) -> None:
+        """Delete all meals for a user."""
+        conn = self._connect()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM meals WHERE user = ?", (user,))
+            conn.execute("DELETE FROM daily_totals WHERE user = ?", (user,))
+            conn.execute("UPDATE generation SET value = value + 1 WHERE id = 1")
+
+    def version(self, user: str = DEFAULT_USER) -> int:
+        """Return the write generation, bumped in every write transaction."""
+        return self._connect().execute("SELECT value FROM generation WHERE id = 1").fetchone()[0]
+
+    def write_lock(self, user: str = DEFAULT_USER) -> FileLock:
+        """Lock excluding writes from other threads and processes."""
+        return self._write_lock
+
+    def disk_usage(self, user: str = DEFAULT_USER) -> int:
+        """Size of the database file plus its WAL and shared-memory files."""
+        files = [self.db_file, *(self.db_file.with_name(self.db_file.name + s) for s in ("-wal", "-shm"))]
+        return sum(f.stat().st_size for f in files if f.exists())
+
+    def close(self) -> None:
+        """Close every connection opened by this backend."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
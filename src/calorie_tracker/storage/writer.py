@@ -0,0 +1,128 @@
+"""Group-commit meal writer.
+
+All writes go through one writer thread. Requests that arrive while a
+commit is in flight queue up and are persisted together in the next commit
+(one append + fsync, or one SQLite transaction, per user), so a burst of
+``log_meal`` calls costs a handful of disk syncs instead of one each.
+
+Each caller still gets back its own meals and the day's running calorie
+total as of its last meal, exactly as if the writes had been serialized.
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import Future
+from datetime import date
+
+from .base import DEFAULT_USER, StorageBackend, make_meal
+
+_STOP = object()
+
+
+class _Pending:
+    """One submitted write waiting for its group commit."""
+
+    __slots__ = ("user", "meals", "future")
+
+    def __init__(self, user: str, meals: list[dict]):
+        self.user = user
+        self.meals = meals
+        self.future: Future[list[int]] = Future()
+
+
+class GroupCommitWriter:
+    """Single writer thread that batches concurrent writes into group commits."""
+
+    def __init__(self, storage: StorageBackend, max_batch: int = 256, max_wait: float = 0.0):
+        self.storage = storage
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.commits = 0
+        self.meals_written = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="meal-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, meals: Iterable[dict], user: str = DEFAULT_USER) -> Future[list[int]]:
+        """Queue meals for the next commit.
+
+        The future resolves to the running day total after each meal, in the
+        order given.
+        """
+        pending = _Pending(user, list(meals))
+        self._queue.put(pending)
+        return pending.future
+
+    def add_meal(self, food: str, calories: int, user: str = DEFAULT_USER) -> tuple[dict, int]:
+        """Add a meal and wait for it to commit; returns (meal, day total)."""
+        meal = make_meal(food, calories)
+        totals = self.submit([meal], user).result()
+        return meal, totals[-1]
+
+    def _collect(self, first: _Pending) -> list[_Pending]:
+        """Gather whatever else is queued (optionally waiting max_wait) into one batch."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _commit(self, user: str, pending: list[_Pending]) -> None:
+        """Persist one user's share of a batch and resolve their futures."""
+        meals = [meal for p in pending for meal in p.meals]
+        days = {meal["timestamp"][:10] for meal in meals}
+        # Locked so another worker process can't write between the read and the append
+        with self.storage.write_lock(user):
+            running = {
+                day: self.storage.get_day_total(user, date.fromisoformat(day))["calories"]
+                for day in days
+            }
+            self.storage.add_meals(meals, user)
+        self.commits += 1
+        self.meals_written += len(meals)
+
+        for p in pending:
+            totals = []
+            for meal in p.meals:
+                running[meal["timestamp"][:10]] += meal["calories"]
+                totals.append(running[meal["timestamp"][:10]])
+            p.future.set_result(totals)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            by_user: dict[str, list[_Pending]] = defaultdict(list)
+            for p in self._collect(first):
+                by_user[p.user].append(p)
+
+            for user, pending in by_user.items():
+                try:
+                    self._commit(user, pending)
+                except Exception as e:
+                    for p in pending:
+                        if not p.future.done():
+                            p.future.set_exception(e)
+
+    def stats(self) -> dict:
+        """Commit counters; meals_written / commits is the average batch size."""
+        return {"commits": self.commits, "meals_written": self.meals_written}
+
+    def close(self) -> None:
+        """Finish queued writes and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
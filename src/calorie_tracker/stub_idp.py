@@ -0,0 +1,101 @@
+"""Local stand-in for Keycloak's JWKS and token endpoints.
+
+Generates an RSA key in memory and serves, under ``/realms/<realm>``:
+
+- ``GET  /protocol/openid-connect/certs``: the public key as a JWKS
+- ``POST /protocol/openid-connect/token``: RS256 access tokens for the
+  client_credentials grant (``sub`` is taken from an optional ``username``
+  form field, so one stub can mint tokens for many users)
+
+Used by the load generator and for exercising auth code paths offline.
+"""
+
+import json
+import time
+import uuid
+
+from jwt import encode
+from jwt.algorithms import RSAAlgorithm
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+class StubIdentityProvider:
+    """Minimal OAuth issuer that signs RS256 tokens with an in-memory key."""
+
+    def __init__(
+        self,
+        base_url: str,
+        realm: str = "mcp",
+        client_id: str = "calorie-tracker",
+        token_lifetime: int = 300,
+    ):
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        self.base_url = base_url.rstrip("/")
+        self.realm = realm
+        self.client_id = client_id
+        self.token_lifetime = token_lifetime
+        self.kid = uuid.uuid4().hex[:16]
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.tokens_issued = 0
+        self.jwks_requests = 0
+
+    @property
+    def issuer_url(self) -> str:
+        return f"{self.base_url}/realms/{self.realm}"
+
+    @property
+    def token_url(self) -> str:
+        return f"{self.issuer_url}/protocol/openid-connect/token"
+
+    def jwks(self) -> dict:
+        """Public signing key as a JWK Set."""
+        jwk = json.loads(RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        jwk.update(kid=self.kid, use="sig", alg="RS256")
+        return {"keys": [jwk]}
+
+    def mint_token(self, subject: str, client_id: str | None = None, lifetime: int | None = None) -> str:
+        """Sign an access token the server's verifier will accept."""
+        now = int(time.time())
+        self.tokens_issued += 1
+        return encode(
+            {
+                "iss": self.issuer_url,
+                "sub": subject,
+                "azp": client_id or self.client_id,
+                "scope": "openid profile",
+                "iat": now,
+                "exp": now + (lifetime or self.token_lifetime),
+                "jti": uuid.uuid4().hex,  # distinct even when minted in the same second
+            },
+            self.private_key,
+            algorithm="RS256",
+            headers={"kid": self.kid},
+        )
+
+    async def _certs(self, request: Request) -> JSONResponse:
+        self.jwks_requests += 1
+        return JSONResponse(self.jwks())
+
+    async def _token(self, request: Request) -> JSONResponse:
+        form = await request.form()
+        if form.get("grant_type") != "client_credentials":
+            return JSONResponse({"error": "unsupported_grant_type"}, status_code=400)
+        client_id = form.get("client_id") or self.client_id
+        token = self.mint_token(form.get("username") or f"service-account-{client_id}", client_id)
+        return JSONResponse({
+            "access_token": token,
+            "token_type": "Bearer",
+            "expires_in": self.token_lifetime,
+        })
+
+    def app(self) -> Starlette:
+        """ASGI app serving the JWKS and token endpoints."""
+        prefix = f"/realms/{self.realm}/protocol/openid-connect"
+        return Starlette(routes=[
+            Route(f"{prefix}/certs", self._certs, methods=["GET"]),
+            Route(f"{prefix}/token", self._token, methods=["POST"]),
+        ])
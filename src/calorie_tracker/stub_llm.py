@@ -0,0 +1,111 @@
+"""Local stand-in for ``litellm.acompletion``.
+
+Answers chat completions offline, in the OpenAI response shape litellm
+returns, with or without ``stream=True``. Streamed replies are split into
+small content and tool-call argument deltas (optionally delayed), like a
+real provider's, followed by a usage chunk when ``stream_options`` asks for
+one, so the host's streaming path can be exercised without an API key. Replies come from a script, or else from simple rules:
+
+- "<food> <n> cal" logs the meal with ``log_meal``
+- "summary", "today" or "progress" calls ``get_today_summary``
+- after tool results, the assistant repeats the last result
+
+Run the chat host against it with ``LLM_MODEL=stub``.
+"""
+
+import asyncio
+import json
+import re
+import uuid
+from types import SimpleNamespace
+
+CALORIES = re.compile(r"^(?:i (?:ate|had) )?(?P<food>.+?)\s+(?P<calories>\d+)\s*(?:cal|kcal|calories)\b", re.I)
+SUMMARY_WORDS = ("summary", "today", "progress")
+
+
+def tool_call(name: str, arguments: dict) -> dict:
+    """One scripted tool call."""
+    return {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }
+
+
+class StubLLM:
+    """Scripted or rule-based chat completions."""
+
+    def __init__(self, script: list | None = None, chunk_size: int = 4, chunk_delay: float = 0.0):
+        # Each script entry is a reply: a string, or a list of tool_call()s
+        self.script = list(script or [])
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+
+    def respond(self, messages: list, tools: list | None = None) -> dict:
+        """The assistant message for a conversation."""
+        if self.script:
+            reply = self.script.pop(0)
+            if isinstance(reply, str):
+                return {"role": "assistant", "content": reply}
+            return {"role": "assistant", "content": None, "tool_calls": reply}
+
+        last = messages[-1]
+        tool_names = {t["function"]["name"] for t in tools or []}
+        if last.get("role") == "tool":
+            return {"role": "assistant", "content": last.get("content") or "Done."}
+        text = (last.get("content") or "").strip()
+        if (match := CALORIES.match(text)) and "log_meal" in tool_names:
+            arguments = {"food": match["food"], "calories": int(match["calories"])}
+            return {"role": "assistant", "content": None, "tool_calls": [tool_call("log_meal", arguments)]}
+        if any(word in text.lower() for word in SUMMARY_WORDS) and "get_today_summary" in tool_names:
+            return {"role": "assistant", "content": None, "tool_calls": [tool_call("get_today_summary", {})]}
+        return {"role": "assistant", "content": f"You said: {text}"}
+
+    async def acompletion(
+        self,
+        messages: list,
+        tools: list | None = None,
+        stream: bool = False,
+        stream_options: dict | None = None,
+        **kwargs,
+    ):
+        """Same call shape as ``litellm.acompletion`` (other options are ignored)."""
+        self.requests += 1
+        if kwargs.get("tool_choice") == "none":
+            tools = None
+        message = self.respond(messages, tools)
+        if stream:
+            usage = self._usage(messages, message) if (stream_options or {}).get("include_usage") else None
+            return self._stream(message, usage)
+        return {"choices": [{"message": message, "finish_reason": "stop"}]}
+
+    @staticmethod
+    def _usage(messages: list, message: dict) -> SimpleNamespace:
+        """Token counts estimated at four characters per token."""
+        prompt = sum(len(m.get("content") or "") for m in messages) // 4
+        completion = len(message.get("content") or json.dumps(message.get("tool_calls"))) // 4
+        return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion, total_tokens=prompt + completion)
+
+    def _chunk(self, content=None, tool_calls=None, finish_reason=None) -> SimpleNamespace:
+        delta = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)], usage=None)
+
+    def _pieces(self, text: str):
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+    async def _stream(self, message: dict, usage: SimpleNamespace | None = None):
+        for piece in self._pieces(message.get("content") or ""):
+            await asyncio.sleep(self.chunk_delay)
+            yield self._chunk(content=piece)
+        for index, call in enumerate(message.get("tool_calls") or []):
+            function = SimpleNamespace(name=call["function"]["name"], arguments="")
+            yield self._chunk(tool_calls=[SimpleNamespace(index=index, id=call["id"], type="function", function=function)])
+            for piece in self._pieces(call["function"]["arguments"]):
+                await asyncio.sleep(self.chunk_delay)
+                function = SimpleNamespace(name=None, arguments=piece)
+                yield self._chunk(tool_calls=[SimpleNamespace(index=index, id=None, type=None, function=function)])
+        yield self._chunk(finish_reason="tool_calls" if message.get("tool_calls") else "stop")
+        if usage is not None:
+            yield SimpleNamespace(choices=[], usage=usage)  # like OpenAI's include_usage chunk
@@ -0,0 +1,31 @@
+import pytest
+
+from calorie_tracker.storage import BACKENDS, CachedStorage, PartitionedStorage, engine_factory
+
+
+@pytest.fixture(params=BACKENDS)
+def engine(request, tmp_path):
+    """A bare storage engine of every kind, in a temporary directory."""
+    storage = engine_factory(request.param)(tmp_path)
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def partitioned(engine, tmp_path):
+    """Per-user partitions of the same engine kind."""
+    storage = PartitionedStorage(engine_factory(engine.name), root=tmp_path / "root", users_dir=tmp_path / "users")
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def cached(engine):
+    """The engine behind the write-through meal cache."""
+    return CachedStorage(engine, max_bytes=1 << 20)
+
+
+@pytest.fixture
+def cached_partitioned(partitioned):
+    """The write-through meal cache over per-user partitions."""
+    return CachedStorage(partitioned, max_bytes=1 << 20)
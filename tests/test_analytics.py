@@ -0,0 +1,118 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from calorie_tracker.analytics import format_rollup, rollup
+from calorie_tracker.storage import DEFAULT_USER, make_meal
+
+START = date(2024, 1, 1)
+GOAL = 2000
+
+
+def percentile(values: list[int], q: float) -> float:
+    """Linear interpolation between closest ranks (NumPy's default method)."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def reference(day_totals: dict[date, dict], start: date, end: date, goal: int, window: int) -> dict:
+    """The statistics rollup() should produce, computed one day at a time."""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    calories = [day_totals.get(d, {"calories": 0})["calories"] for d in days]
+    meals = [day_totals.get(d, {"meals": 0})["meals"] for d in days]
+    logged = [i for i, n in enumerate(meals) if n]
+    logged_calories = [calories[i] for i in logged]
+
+    rolling = [sum(calories[i - window + 1:i + 1]) / window for i in range(window - 1, len(days))]
+
+    streaks, run = [], None  # (start index, length) of each over-budget run
+    for i, c in enumerate(calories):
+        if c > goal:
+            run = (run[0], run[1] + 1) if run else (i, 1)
+        elif run:
+            streaks.append(run)
+            run = None
+    if run:
+        streaks.append(run)
+    longest = max(streaks, key=lambda s: s[1], default=None)  # earliest on ties
+
+    def day_at(i: int) -> str:
+        return days[i].isoformat()
+
+    highest = max(range(len(days)), key=lambda i: calories[i])
+    lowest = min(logged, key=lambda i: calories[i], default=None)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "days": len(days),
+        "logged_days": len(logged),
+        "daily_goal": goal,
+        "total_calories": sum(calories),
+        "total_meals": sum(meals),
+        "avg_per_day": round(sum(calories) / len(days), 1),
+        "avg_per_logged_day": round(sum(logged_calories) / len(logged), 1) if logged else 0.0,
+        "rolling_window": window,
+        "rolling_avg_latest": round(rolling[-1], 1) if rolling else None,
+        "rolling_avg_change": round(rolling[-1] - rolling[-1 - window], 1) if len(rolling) > window else None,
+        "p50_logged_day": round(percentile(logged_calories, 50), 1) if logged else 0.0,
+        "p90_logged_day": round(percentile(logged_calories, 90), 1) if logged else 0.0,
+        "over_budget_days": sum(c > goal for c in calories),
+        "under_budget_logged_days": sum(calories[i] <= goal for i in logged),
+        "longest_over_budget_streak": {
+            "days": longest[1],
+            "start": day_at(longest[0]),
+            "end": day_at(longest[0] + longest[1] - 1),
+        } if longest else None,
+        "current_over_budget_streak": streaks[-1][1] if streaks and calories[-1] > goal else 0,
+        "highest_day": {"date": day_at(highest), "calories": calories[highest]} if logged else None,
+        "lowest_logged_day": {"date": day_at(lowest), "calories": calories[lowest]} if logged else None,
+    }
+
+
+def random_history(seed: int, n_days: int) -> dict[date, dict]:
+    rng = random.Random(seed)
+    history = {}
+    for i in range(n_days):
+        if rng.random() < 0.8:  # some days are never logged
+            history[START + timedelta(days=i)] = {"calories": rng.randrange(0, 4000, 50), "meals": rng.randint(1, 5)}
+    return history
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("n_days, window", [(1, 7), (10, 7), (90, 7), (400, 30)])
+def test_rollup_matches_reference(seed, n_days, window):
+    history = random_history(seed, n_days)
+    end = START + timedelta(days=n_days - 1)
+
+    stats = rollup(sorted(history.items()), START, end, GOAL, window)
+
+    assert stats == reference(history, START, end, GOAL, window)
+    assert format_rollup(stats)
+
+
+def test_rollup_of_empty_range():
+    end = START + timedelta(days=13)
+    stats = rollup([], START, end, GOAL)
+
+    assert stats == reference({}, START, end, GOAL, 7)
+    assert stats["longest_over_budget_streak"] is None and stats["highest_day"] is None
+    assert stats["rolling_avg_change"] == 0.0
+
+
+def test_rollup_from_engine_day_totals(engine):
+    history = random_history(seed=42, n_days=60)
+    for day, totals in history.items():
+        engine.add_meals([
+            make_meal("meal", totals["calories"] // totals["meals"], datetime.combine(day, time(8 + i)))
+            for i in range(totals["meals"])
+        ])
+        totals["calories"] = totals["calories"] // totals["meals"] * totals["meals"]
+    end = START + timedelta(days=59)
+
+    stats = rollup(engine.iter_day_totals(DEFAULT_USER, START, end), START, end, GOAL)
+
+    assert stats == reference(history, START, end, GOAL, 7)
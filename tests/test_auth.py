@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import httpx
+
+from calorie_tracker.auth import OAuthTokenVerifier, TokenCache
+from calorie_tracker.jwks import JWKSManager
+from calorie_tracker.stub_idp import StubIdentityProvider
+
+
+def verifier(idp: StubIdentityProvider, cache: TokenCache | None = None) -> OAuthTokenVerifier:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=idp.app()))
+    jwks = JWKSManager(f"{idp.issuer_url}/protocol/openid-connect/certs", http_client=client)
+    return OAuthTokenVerifier(idp.issuer_url, idp.client_id, cache=cache, jwks=jwks)
+
+
+def test_verified_tokens_are_cached():
+    idp = StubIdentityProvider("http://idp.test")
+    token = idp.mint_token("alice")
+
+    async def verify_twice():
+        v = verifier(idp)
+        return await v.verify_token(token), await v.verify_token(token), v
+
+    first, second, v = asyncio.run(verify_twice())
+    assert first is second
+    assert first.subject == "alice"
+    assert v.cache_stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_rejections_are_cached_briefly():
+    idp = StubIdentityProvider("http://idp.test")
+    foreign = StubIdentityProvider("http://other.test").mint_token("mallory")
+    cache = TokenCache(negative_ttl=0.05)
+
+    async def verify(v, times):
+        return [await v.verify_token(foreign) for _ in range(times)]
+
+    v = verifier(idp, cache)
+    assert asyncio.run(verify(v, 2)) == [None, None]
+    assert cache.stats()["hits"] == 1
+    time.sleep(0.06)
+    assert cache.get(foreign) is TokenCache.MISS
+
+
+def test_cache_is_bounded_lru():
+    idp = StubIdentityProvider("http://idp.test")
+    tokens = [idp.mint_token(f"user{i}") for i in range(3)]
+    cache = TokenCache(max_size=2)
+
+    async def verify_all():
+        v = verifier(idp, cache)
+        for token in (tokens[0], tokens[1], tokens[0], tokens[2]):
+            await v.verify_token(token)
+
+    asyncio.run(verify_all())
+    assert cache.stats()["size"] == 2
+    assert cache.get(tokens[0]) is not TokenCache.MISS  # recently used
+    assert cache.get(tokens[1]) is TokenCache.MISS  # evicted
@@ -0,0 +1,59 @@
+import threading
+import time as time_module
+from datetime import date, datetime, time
+
+from calorie_tracker.storage import DEFAULT_USER, day_range, make_meal
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(date.today(), time(hour, minute))
+
+
+def test_backdated_meal_keeps_cached_day_in_order(cached):
+    cached.add_meals([make_meal("a", 100, at(8)), make_meal("b", 200, at(9))])
+    assert [m["food"] for m in cached.load_meals(DEFAULT_USER, *day_range())] == ["a", "b"]  # now cached
+
+    cached.add_meals([make_meal("c", 300, at(7))])
+
+    assert [m["food"] for m in cached.load_meals(DEFAULT_USER, *day_range())] == ["c", "a", "b"]
+    assert cached.stats()["hits"] >= 1
+
+
+def test_cached_day_matches_engine(cached, engine):
+    cached.add_meals([make_meal("a", 100, at(12))])
+    cached.load_meals(DEFAULT_USER, *day_range())
+    cached.add_meals([make_meal("b", 50, at(6)), make_meal("c", 75, at(12)), make_meal("d", 10, at(23, 59))])
+
+    assert cached.load_meals(DEFAULT_USER, *day_range()) == engine.load_meals(DEFAULT_USER, *day_range())
+    assert cached.get_day_total()["calories"] == 235
+
+
+def test_slow_write_does_not_block_other_users(cached_partitioned, partitioned):
+    cached, engine = cached_partitioned, partitioned
+    cached.add_meals([make_meal("toast", 90, at(8))], "bob")
+    cached.load_meals("bob", *day_range())
+    cached.get_day_total("bob")
+
+    in_write, release = threading.Event(), threading.Event()
+    add_meals = engine.add_meals
+
+    def slow_add_meals(meals, user=DEFAULT_USER):
+        if user == "alice":
+            in_write.set()
+            release.wait(5)  # e.g. a slow fsync
+        add_meals(meals, user)
+
+    engine.add_meals = slow_add_meals
+    writer = threading.Thread(target=cached.add_meals, args=([make_meal("cake", 500, at(9))], "alice"))
+    writer.start()
+    try:
+        assert in_write.wait(5)
+        started = time_module.perf_counter()
+        assert cached.get_day_total("bob")["calories"] == 90
+        assert [m["food"] for m in cached.load_meals("bob", *day_range())] == ["toast"]
+        cached.add_meals([make_meal("tea", 5, at(10))], "bob")
+        assert time_module.perf_counter() - started < 1
+    finally:
+        release.set()
+        writer.join()
+    assert cached.get_day_total("alice")["calories"] == 500
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from calorie_tracker.client_auth import ClientCredentialsAuth
+from calorie_tracker.stub_idp import StubIdentityProvider
+
+
+def client_auth(app, token_url: str, **kwargs) -> ClientCredentialsAuth:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    return ClientCredentialsAuth(token_url, "calorie-tracker", "secret", http_client=client, **kwargs)
+
+
+def test_token_is_refreshed_before_it_expires():
+    idp = StubIdentityProvider("http://idp.test", token_lifetime=2)
+
+    async def watch():
+        async with client_auth(idp.app(), idp.token_url, refresh_margin=1) as auth:
+            first = await auth.get_token()
+            await asyncio.sleep(1.5)  # refreshed 1 s before the 2 s expiry
+            return first, auth.fetches, auth.valid
+
+    first, fetches, valid = asyncio.run(watch())
+    assert first
+    assert fetches == 2
+    assert valid
+
+
+def test_concurrent_401s_share_one_refresh():
+    idp = StubIdentityProvider("http://idp.test")
+    rejected: set[str] = set()
+
+    async def api(request: Request) -> JSONResponse:
+        token = request.headers["Authorization"].removeprefix("Bearer ")
+        if not rejected:
+            rejected.add(token)  # the server revokes the first token
+        if token in rejected:
+            return JSONResponse({"error": "invalid_token"}, status_code=401)
+        return JSONResponse({"ok": True})
+
+    async def call_many():
+        async with client_auth(idp.app(), idp.token_url) as auth:
+            transport = httpx.ASGITransport(app=Starlette(routes=[Route("/api", api)]))
+            async with httpx.AsyncClient(transport=transport, base_url="http://api.test", auth=auth) as client:
+                responses = await asyncio.gather(*(client.get("/api") for _ in range(10)))
+            return [r.status_code for r in responses], auth.fetches
+
+    statuses, fetches = asyncio.run(call_many())
+    assert statuses == [200] * 10
+    assert fetches == 2
+
+
+@pytest.mark.parametrize("status, payload, error", [
+    (500, {"error": "server_error"}, httpx.HTTPStatusError),
+    (200, {"access_token": "t", "expires_in": None}, TypeError),
+])
+def test_failed_first_fetch_is_raised(status, payload, error):
+    async def token(request: Request) -> JSONResponse:
+        return JSONResponse(payload, status_code=status)
+
+    async def first_token():
+        app = Starlette(routes=[Route("/token", token, methods=["POST"])])
+        async with client_auth(app, "http://idp.test/token") as auth:
+            with pytest.raises(error):
+                await asyncio.wait_for(auth.get_token(), timeout=5)
+            with pytest.raises(error):  # later callers don't hang either
+                await asyncio.wait_for(auth.get_token(), timeout=5)
+
+    asyncio.run(first_token())
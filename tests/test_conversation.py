@@ -0,0 +1,52 @@
+from calorie_tracker.conversation import Conversation, estimate_tokens
+
+
+def tool_turn(conversation: Conversation, i: int, result: str) -> None:
+    """A user message, a get_today_summary call, its result and the answer."""
+    call_id = f"call_{i}"
+    conversation.add_user(f"question {i}")
+    conversation.add(
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "get_today_summary", "arguments": "{}"}},
+        ]},
+        {"role": "tool", "tool_call_id": call_id, "content": result},
+        {"role": "assistant", "content": f"answer {i}"},
+    )
+
+
+def test_old_turns_are_compacted_into_a_digest():
+    conversation = Conversation("system", keep_turns=2)
+    for i in range(4):
+        tool_turn(conversation, i, f"Total: {i * 100} cal")
+
+    messages = conversation.messages()
+
+    assert messages[0] == {"role": "system", "content": "system"}
+    assert "get_today_summary: Total: 100 cal" in messages[1]["content"]  # latest compacted result
+    contents = [m.get("content") for m in messages[2:]]
+    assert contents[:4] == ["question 0", "answer 0", "question 1", "answer 1"]
+    assert "Total: 300 cal" in contents  # recent turns are verbatim
+
+
+def test_prompt_stays_within_budget():
+    conversation = Conversation("system", max_tokens=200, keep_turns=2)
+    for i in range(50):
+        tool_turn(conversation, i, "x" * 200)
+        messages = conversation.messages()
+        assert sum(estimate_tokens(m) for m in messages) <= 200
+
+    stats = conversation.stats()
+    assert stats["max_prompt_tokens"] <= 200
+    assert stats["dropped_turns"] > 0
+    assert messages[-1]["content"] == "answer 49"
+
+
+def test_oversized_current_turn_is_sent_whole():
+    conversation = Conversation("system", max_tokens=50)
+    tool_turn(conversation, 0, "short")
+    conversation.add_user("y" * 1000)
+
+    messages = conversation.messages()
+
+    assert messages[-1]["content"] == "y" * 1000
+    assert conversation.stats()["turns"] == 1
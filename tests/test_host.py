@@ -0,0 +1,110 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from mcp.types import CallToolResult, TextContent
+
+from calorie_tracker.host import read_stream, run_tool_calls
+from calorie_tracker.stub_llm import StubLLM, tool_call
+
+
+def chunk(content=None, tool_calls=None) -> SimpleNamespace:
+    delta = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+
+
+async def counted(stream, seen: list):
+    """Pass a stream through, counting the chunks consumed so far."""
+    async for item in stream:
+        seen.append(item)
+        yield item
+
+
+def test_content_deltas_are_assembled_with_usage():
+    llm = StubLLM(script=["You have 1200 cal left today."], chunk_size=3)
+
+    async def read():
+        messages = [{"role": "user", "content": "how am I doing?"}]
+        stream = await llm.acompletion(messages, stream=True, stream_options={"include_usage": True})
+        return await read_stream(stream, on_tool_call=lambda call: None)
+
+    message, usage, first_delta = asyncio.run(read())
+    assert message == {"role": "assistant", "content": "You have 1200 cal left today."}
+    assert usage.prompt_tokens > 0 and usage.completion_tokens > 0
+    assert first_delta is not None
+
+
+def test_tool_calls_are_handed_off_as_each_completes():
+    calls = [tool_call("log_meal", {"food": "toast", "calories": 120}), tool_call("get_today_summary", {})]
+    llm = StubLLM(script=[calls], chunk_size=4)
+    seen, handed = [], []
+
+    async def read():
+        stream = await llm.acompletion([{"role": "user", "content": "toast 120 cal"}], stream=True)
+        return await read_stream(counted(stream, seen), on_tool_call=lambda call: handed.append((call, len(seen))))
+
+    message, usage, _ = asyncio.run(read())
+
+    assert message["content"] is None
+    assert message["tool_calls"] == calls
+    assert [call["id"] for call, _ in handed] == [c["id"] for c in calls]
+    assert json.loads(handed[0][0]["function"]["arguments"]) == {"food": "toast", "calories": 120}
+    assert handed[0][1] < len(seen) - 1  # before the second call streamed
+    assert usage is None
+
+
+def test_time_to_first_token_skips_empty_deltas():
+    async def slow_stream():
+        yield chunk()  # role-only opener
+        await asyncio.sleep(0.05)
+        yield chunk(content="Hi")
+        await asyncio.sleep(0.05)
+        yield chunk(content="!")
+
+    async def read():
+        started = time.perf_counter()
+        message, _, first_delta = await read_stream(slow_stream(), on_tool_call=lambda call: None)
+        return message, first_delta - started, time.perf_counter() - started
+
+    message, ttft, total = asyncio.run(read())
+    assert message["content"] == "Hi!"
+    assert 0.05 <= ttft < total - 0.04
+
+
+class FakeSession:
+    """MCP session whose tools sleep, and fail when asked to."""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def call_tool(self, name, arguments=None, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(arguments["delay"])
+            if name == "fail":
+                raise RuntimeError("tool crashed")
+            return CallToolResult(content=[TextContent(type="text", text=f"done {arguments['n']}")])
+        finally:
+            self.active -= 1
+
+
+def test_tool_calls_run_concurrently_in_call_order():
+    pytest.importorskip("litellm")
+    session = FakeSession()
+    # Later calls finish first; call 2 fails
+    calls = [
+        tool_call("fail" if n == 2 else "work", {"n": n, "delay": 0.02 * (6 - n)})
+        for n in range(6)
+    ]
+
+    messages = asyncio.run(run_tool_calls(session, calls, limit=3))
+
+    assert [m["tool_call_id"] for m in messages] == [c["id"] for c in calls]
+    assert [m["content"] for m in messages[:2]] == ["done 0", "done 1"]
+    assert messages[2]["content"].startswith("Error: ") and "tool crashed" in messages[2]["content"]
+    assert [m["content"] for m in messages[3:]] == ["done 3", "done 4", "done 5"]
+    assert session.max_active == 3
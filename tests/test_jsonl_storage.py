@@ -0,0 +1,40 @@
+import json
+from datetime import date, datetime, time
+
+from calorie_tracker.storage import DEFAULT_USER, JsonlStorage, day_range, make_meal
+
+
+def at(hour: int) -> datetime:
+    return datetime.combine(date.today(), time(hour))
+
+
+def test_append_after_torn_line(tmp_path):
+    log = tmp_path / "meals.jsonl"
+    storage = JsonlStorage(log)
+    storage.add_meals([make_meal("before", 100, at(8))])
+    with log.open("a") as f:
+        f.write('{"food": "torn", "calo')  # crash mid-append
+
+    JsonlStorage(log).add_meals([make_meal("after", 5, at(9))])  # after a restart
+    storage.add_meals([make_meal("later", 7, at(10))])
+
+    for reader in (storage, JsonlStorage(log)):
+        assert [m["food"] for m in reader.load_meals()] == ["before", "after", "later"]
+        assert [m["food"] for m in reader.load_meals(DEFAULT_USER, *day_range())] == ["before", "after", "later"]
+        assert reader.get_day_total()["calories"] == 112
+
+
+def test_legacy_meals_json_is_migrated_once(tmp_path):
+    log, legacy = tmp_path / "meals.jsonl", tmp_path / "meals.json"
+    legacy.write_text(json.dumps([make_meal("old", 300, at(7))]))
+    log.write_text(json.dumps({**make_meal("new", 50, at(12)), "user": DEFAULT_USER}) + "\n")
+
+    storage = JsonlStorage(log, legacy_file=legacy)
+    assert [m["food"] for m in storage.load_meals()] == ["old", "new"]
+    assert storage.get_day_total()["calories"] == 350
+    assert not legacy.exists()
+    assert json.loads((tmp_path / "meals.json.bak").read_text())[0]["food"] == "old"
+
+    assert storage.migrate_legacy_meals() == 0
+    storage.add_meals([make_meal("more", 1, at(13))])
+    assert [m["food"] for m in JsonlStorage(log, legacy_file=legacy).load_meals()] == ["old", "new", "more"]
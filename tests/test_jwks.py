@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+import pytest
+from jwt import InvalidTokenError
+
+from calorie_tracker.jwks import JWKSManager
+from calorie_tracker.stub_idp import StubIdentityProvider
+
+
+def manager(idp: StubIdentityProvider) -> JWKSManager:
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=idp.app()))
+    return JWKSManager(f"{idp.issuer_url}/protocol/openid-connect/certs", http_client=client)
+
+
+def test_key_without_kid_before_keys_load():
+    idp = StubIdentityProvider("http://idp.test")
+
+    async def verify_twice():
+        jwks = manager(idp)
+        first = await jwks.get_signing_key(None)  # nothing fetched yet
+        second = await jwks.get_signing_key(None)
+        return jwks.fetches, first, second
+
+    fetches, first, second = asyncio.run(verify_twice())
+    assert fetches == 1
+    assert first.key_id == second.key_id == idp.kid
+
+
+def test_unknown_kid_refreshes_once_then_rejects():
+    idp = StubIdentityProvider("http://idp.test")
+
+    async def verify_unknown():
+        jwks = manager(idp)
+        for _ in range(2):
+            with pytest.raises(InvalidTokenError):
+                await jwks.get_signing_key("rotated-away")
+        return jwks.fetches
+
+    assert asyncio.run(verify_unknown()) == 1  # the second miss is rate-limited
@@ -0,0 +1,69 @@
+import multiprocessing
+from datetime import date, datetime, time
+from pathlib import Path
+
+import pytest
+
+from calorie_tracker.storage import CachedStorage, engine_factory, make_meal
+from calorie_tracker.storage.locking import FileLock, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="FileLock only excludes other processes with fcntl")
+
+PROCESSES = 3
+WRITES = 40
+
+
+def run_all(target, *args) -> None:
+    """Run ``target(n, *args)`` in PROCESSES fresh interpreters and wait for them."""
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=target, args=(n, *args)) for n in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+    assert [w.exitcode for w in workers] == [0] * PROCESSES
+
+
+def increment(n: int, counter: Path) -> None:
+    lock = FileLock(counter.with_suffix(".lock"))
+    for _ in range(WRITES):
+        with lock:
+            with lock:  # re-entry must not deadlock or drop the flock early
+                value = int(counter.read_text())
+            counter.write_text(str(value + 1))
+
+
+def log_meals(n: int, backend: str, directory: Path) -> None:
+    storage = CachedStorage(engine_factory(backend)(directory), max_bytes=1 << 20)
+    now = datetime.combine(date.today(), time(12))
+    for i in range(WRITES):
+        storage.get_day_total()  # keep today cached, as a server worker would
+        storage.add_meals([make_meal(f"p{n}-{i}", n + 1, now)])
+    storage.close()
+
+
+def test_read_modify_write_across_processes(tmp_path):
+    counter = tmp_path / "counter"
+    counter.write_text("0")
+
+    run_all(increment, counter)
+
+    assert int(counter.read_text()) == PROCESSES * WRITES
+
+
+def test_no_meals_are_lost_across_processes(engine, tmp_path):
+    cached = CachedStorage(engine, max_bytes=1 << 20)
+    assert cached.get_day_total()["calories"] == 0  # cached before the other processes write
+
+    run_all(log_meals, engine.name, tmp_path)
+
+    expected = WRITES * sum(n + 1 for n in range(PROCESSES))
+    fresh = engine_factory(engine.name)(tmp_path)
+    try:
+        for reader in (fresh, cached):
+            meals = reader.load_meals()
+            assert len(meals) == PROCESSES * WRITES
+            assert len({m["food"] for m in meals}) == PROCESSES * WRITES
+            assert reader.get_day_total()["calories"] == expected
+    finally:
+        fresh.close()
@@ -0,0 +1,35 @@
+import logging
+import queue
+
+from calorie_tracker import logging_config
+from calorie_tracker.logging_config import NonBlockingQueueHandler, dropped_records, setup_logging, shutdown_logging
+
+
+def test_full_queue_drops_records():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.full_queue")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        for i in range(3):
+            logger.warning("record %d", i)
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.dropped == 2
+
+
+def test_dropped_records_are_reported_at_shutdown(capsys):
+    root = logging.getLogger(logging_config.ROOT_LOGGER)
+    saved = root.handlers[:], root.level, root.propagate
+    setup_logging()
+    try:
+        logging_config._handler.dropped = 3
+        assert dropped_records() == 3
+        shutdown_logging()
+
+        assert "Dropped 3 log records" in capsys.readouterr().err
+        assert dropped_records() == 0
+    finally:
+        shutdown_logging()
+        root.handlers[:], root.level, root.propagate = saved
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from calorie_tracker import metrics
+from calorie_tracker.metrics import TOOL_CALLS, TOOL_LATENCY, Counter, Histogram, gauge_lines, track_tool
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    """Keep metrics created by a test out of the process-wide registry."""
+    monkeypatch.setattr(metrics, "_metrics", [])
+    monkeypatch.setattr(metrics, "_collectors", [])
+
+
+def test_counter_rendering():
+    counter = Counter("meals_total", "Meals logged.", ("user",))
+    counter.inc(user="alice")
+    counter.inc(2, user="alice")
+    counter.inc(0.5, user="bob")
+
+    assert metrics.render().splitlines() == [
+        "# HELP meals_total Meals logged.",
+        "# TYPE meals_total counter",
+        'meals_total{user="alice"} 3',
+        'meals_total{user="bob"} 0.5',
+    ]
+
+
+def test_histogram_rendering():
+    histogram = Histogram("wait_seconds", "Wait time.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert metrics.render().splitlines() == [
+        "# HELP wait_seconds Wait time.",
+        "# TYPE wait_seconds histogram",
+        'wait_seconds_bucket{le="0.1"} 2',  # upper bounds are inclusive
+        'wait_seconds_bucket{le="1"} 3',
+        'wait_seconds_bucket{le="+Inf"} 4',
+        "wait_seconds_sum 2.650000",
+        "wait_seconds_count 4",
+    ]
+
+
+def test_broken_collector_does_not_break_the_scrape():
+    def broken():
+        raise RuntimeError("gone")
+
+    metrics.register_collector(broken)
+    metrics.register_collector(lambda: gauge_lines("queue_depth", "Queued items.", {"writer": 2}, label="name"))
+
+    assert metrics.render().splitlines() == [
+        "# HELP queue_depth Queued items.",
+        "# TYPE queue_depth gauge",
+        'queue_depth{name="writer"} 2',
+    ]
+
+
+def counts(tool: str) -> tuple[float, float, int]:
+    latency = TOOL_LATENCY._series.get((tool,))
+    return (
+        TOOL_CALLS._values.get((tool, "ok"), 0),
+        TOOL_CALLS._values.get((tool, "error"), 0),
+        latency[-1] if latency else 0,
+    )
+
+
+@pytest.mark.parametrize("is_async", [False, True], ids=["sync", "async"])
+def test_track_tool_records_outcome_and_latency(is_async):
+    tool = f"divide_{'async' if is_async else 'sync'}"
+
+    def divide(a, b):
+        return a / b
+
+    async def divide_async(a, b):
+        await asyncio.sleep(0)
+        return a / b
+
+    fn = divide_async if is_async else divide
+    fn.__name__ = tool
+    tracked = track_tool(fn)
+    assert tracked.__name__ == tool
+
+    def call(*args):
+        result = tracked(*args)
+        return asyncio.run(result) if is_async else result
+
+    before = counts(tool)
+    assert call(6, 3) == 2
+    with pytest.raises(ZeroDivisionError):
+        call(1, 0)
+
+    ok, error, observed = (now - then for now, then in zip(counts(tool), before))
+    assert (ok, error, observed) == (1, 1, 2)
@@ -0,0 +1,17 @@
+import asyncio
+
+from calorie_tracker import oauth_proxy
+
+
+def test_client_is_created_at_start_and_closed_on_shutdown():
+    async def run():
+        assert oauth_proxy._http_client is None
+        async with oauth_proxy.http_client_lifespan():
+            client = oauth_proxy._http_client
+            assert client is not None  # before any proxied request
+            assert oauth_proxy.get_http_client() is client
+        return client
+
+    client = asyncio.run(run())
+    assert client.is_closed
+    assert oauth_proxy._http_client is None
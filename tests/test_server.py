@@ -0,0 +1,157 @@
+import asyncio
+import json
+import re
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import ResourceUpdatedNotification, ServerNotification
+from pydantic import AnyUrl
+
+from calorie_tracker import server
+from calorie_tracker.storage import AsyncStorage, GroupCommitWriter, make_meal
+
+
+@pytest.fixture
+def storage(cached_partitioned, monkeypatch):
+    """Point the tools at a temporary store, without OAuth."""
+    async_storage = AsyncStorage(cached_partitioned, max_workers=2)
+    monkeypatch.setattr(server, "OAUTH_ISSUER_URL", "")
+    monkeypatch.setattr(server, "get_async_storage", lambda: async_storage)
+    yield cached_partitioned
+    async_storage.close()
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(date.today(), time(hour, minute))
+
+
+def all_pages(limit: int) -> list[str]:
+    """Follow get_today_summary cursors to the end; returns the listed foods."""
+    foods, cursor = [], None
+    while True:
+        page = asyncio.run(server.get_today_summary(None, limit=limit, cursor=cursor))
+        foods += re.findall(r"^  \d+\. (\S+) - ", page, re.M)
+        match = re.search(r'cursor="([^"]+)"', page)
+        if not match:
+            return foods
+        cursor = match.group(1)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_pagination_with_equal_timestamps(storage, limit):
+    storage.add_meals([make_meal("early", 100, at(7))])
+    storage.add_meals([make_meal(f"same{i}", 10, at(12)) for i in range(5)])
+    storage.add_meals([make_meal("late", 100, at(20))])
+
+    assert all_pages(limit) == ["early", "same0", "same1", "same2", "same3", "same4", "late"]
+
+
+def test_pagination_after_backdated_writes(storage):
+    storage.add_meals([make_meal("lunch", 500, at(12)), make_meal("dinner", 700, at(19))])
+    asyncio.run(server.get_today_summary(None))  # cache the day
+    storage.add_meals([make_meal("breakfast", 300, at(8)), make_meal("snack", 100, at(12))])
+
+    assert all_pages(limit=1) == ["breakfast", "lunch", "snack", "dinner"]
+
+
+def test_cursor_from_another_day_is_rejected(storage):
+    storage.add_meals([make_meal("a", 1, at(9)), make_meal("b", 1, at(10))])
+    stale = server._encode_cursor(date(2000, 1, 1), at(9).isoformat(), 1, 1)
+
+    with pytest.raises(ValueError, match="expired"):
+        asyncio.run(server.get_today_summary(None, limit=1, cursor=stale))
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_summary_totals_match_meals(storage, granularity, monkeypatch):
+    first = date(2024, 1, 29)
+    for offset in range(0, 40, 3):
+        day = first + timedelta(days=offset)
+        storage.add_meals([
+            make_meal("a", 100 + offset, datetime.combine(day, time(8))),
+            make_meal("b", 50, datetime.combine(day, time(19))),
+        ])
+    end = first + timedelta(days=35)
+
+    def summary(include_meals):
+        return json.loads(asyncio.run(server.get_summary(
+            first + timedelta(days=1), None, end, granularity, include_meals=include_meals, format="json",
+        )))
+
+    detailed = summary(True)
+
+    async def no_meal_reads(*args, **kwargs):
+        raise AssertionError("totals-only summaries should not load meals")
+
+    monkeypatch.setattr(server.get_async_storage(), "load_meals", no_meal_reads)
+    totals = summary(False)
+
+    for bucket in detailed["buckets"]:
+        bucket["items"] = []
+    assert totals == detailed
+    assert totals["total"]["meals"] == 22
+
+
+def test_today_subscribers_are_notified(storage, writer):
+    received = []
+
+    async def on_message(message):
+        if isinstance(message, ServerNotification):
+            received.append(message.root)
+
+    async def subscribe_and_log():
+        async with create_connected_server_and_client_session(
+            server.create_server(), message_handler=on_message
+        ) as session:
+            capabilities = session.get_server_capabilities()
+            await session.subscribe_resource(AnyUrl(server.TODAY_URI))
+            await session.call_tool("log_meal", {"food": "toast", "calories": 120})
+            await asyncio.sleep(0.1)  # let the notification arrive
+            snapshot = json.loads((await session.read_resource(AnyUrl(server.TODAY_URI))).contents[0].text)
+            return capabilities, snapshot
+
+    capabilities, snapshot = asyncio.run(subscribe_and_log())
+
+    assert capabilities.resources.subscribe is True
+    assert [(type(n), str(n.params.uri)) for n in received] == [(ResourceUpdatedNotification, server.TODAY_URI)]
+    assert snapshot["calories"] == 120
+
+
+def call_tool(name: str, arguments: dict):
+    async def call():
+        async with create_connected_server_and_client_session(server.create_server()) as session:
+            return await session.call_tool(name, arguments)
+
+    return asyncio.run(call())
+
+
+@pytest.fixture
+def writer(storage, monkeypatch):
+    writer = GroupCommitWriter(storage)
+    monkeypatch.setattr(server, "get_writer", lambda: writer)
+    yield writer
+    writer.close()
+
+
+def test_log_meals_batch_limit(storage, writer):
+    meals = [{"food": f"bite{i}", "calories": 1} for i in range(server.MAX_MEALS_PER_BATCH + 1)]
+
+    rejected = call_tool("log_meals", {"meals": meals})
+    assert rejected.isError
+    assert storage.load_meals() == []
+
+    accepted = call_tool("log_meals", {"meals": meals[:-1]})
+    assert not accepted.isError
+    assert accepted.content[0].text.startswith(f"Logged {server.MAX_MEALS_PER_BATCH} meals: ")
+    assert len(storage.load_meals()) == server.MAX_MEALS_PER_BATCH
+
+
+def test_log_meals_stores_aware_timestamps_as_local_time(storage, writer):
+    eaten = datetime.now(timezone(timedelta(hours=5, minutes=30))).replace(microsecond=0)
+
+    result = call_tool("log_meals", {"meals": [{"food": "dosa", "calories": 250, "timestamp": eaten.isoformat()}]})
+
+    assert result.content[0].text.startswith("Logged 1 meal: dosa (250 cal) = 250 cal.")
+    [meal] = storage.load_meals()
+    assert datetime.fromisoformat(meal["timestamp"]) == eaten.astimezone().replace(tzinfo=None)
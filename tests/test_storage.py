@@ -0,0 +1,64 @@
+from datetime import date, datetime, time, timedelta
+
+from calorie_tracker.storage import DEFAULT_USER, day_range, make_meal
+
+TODAY = date.today()
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+def at(day: date, hour: int) -> datetime:
+    return datetime.combine(day, time(hour))
+
+
+def test_range_reads_are_ordered_and_half_open(engine):
+    engine.add_meals([make_meal("b", 2, at(TODAY, 12)), make_meal("a", 1, at(TODAY, 8))])
+    engine.add_meals([make_meal("y", 5, at(YESTERDAY, 20)), make_meal("next", 9, day_range()[1])])
+
+    assert [m["food"] for m in engine.load_meals()] == ["y", "a", "b", "next"]
+    assert [m["food"] for m in engine.load_meals(DEFAULT_USER, *day_range())] == ["a", "b"]
+    assert engine.get_total_calories(DEFAULT_USER, *day_range(YESTERDAY)) == 5
+
+
+def test_day_totals(engine):
+    engine.add_meals([make_meal("a", 100, at(TODAY, 8)), make_meal("b", 50, at(TODAY, 13))])
+    engine.add_meals([make_meal("y", 300, at(YESTERDAY, 20))])
+
+    assert engine.get_day_total() == {"calories": 150, "meals": 2, "updated_at": at(TODAY, 13).isoformat()}
+    assert [(day, t["calories"]) for day, t in engine.iter_day_totals(DEFAULT_USER, YESTERDAY, TODAY)] == [
+        (YESTERDAY, 300),
+        (TODAY, 150),
+    ]
+    assert list(engine.iter_day_totals(DEFAULT_USER, TODAY + timedelta(days=1))) == []
+
+
+def test_version_changes_on_write_and_clear(engine):
+    before = engine.version()
+    engine.add_meals([make_meal("a", 1, at(TODAY, 8))])
+    written = engine.version()
+    engine.clear_meals()
+
+    assert engine.load_meals() == []
+    assert engine.get_day_total()["calories"] == 0
+    if before is not None:
+        assert len({before, written, engine.version()}) == 3
+
+
+def test_partitions_keep_users_apart(partitioned):
+    partitioned.add_meals([make_meal("mine", 100, at(TODAY, 8))], user="alice")
+    partitioned.add_meals([make_meal("theirs", 200, at(TODAY, 9))], user="bob")
+
+    assert [m["food"] for m in partitioned.load_meals("alice")] == ["mine"]
+    assert partitioned.get_day_total("bob")["calories"] == 200
+    assert set(partitioned.tenant_stats()) >= {"alice", "bob"}
+
+
+def test_known_users_reuse_the_default_partition(partitioned, monkeypatch):
+    default = partitioned.partition(DEFAULT_USER)
+    assert partitioned.known_users() == []
+
+    def no_new_engines(directory):
+        raise AssertionError(f"opened a throwaway engine on {directory}")
+
+    monkeypatch.setattr(partitioned, "factory", no_new_engines)
+    default.add_meals([make_meal("a", 1, at(TODAY, 8))])
+    assert partitioned.known_users() == [DEFAULT_USER]
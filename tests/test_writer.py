@@ -0,0 +1,48 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from calorie_tracker.storage import DEFAULT_USER, GroupCommitWriter, make_meal
+
+
+@pytest.fixture
+def writer(partitioned):
+    writer = GroupCommitWriter(partitioned, max_wait=0.05)
+    yield writer
+    writer.close()
+
+
+def at(day: date, hour: int) -> datetime:
+    return datetime.combine(day, time(hour))
+
+
+def test_running_totals_within_one_commit(writer, partitioned):
+    today = date.today()
+    partitioned.add_meals([make_meal("existing", 100, at(today, 7))])
+
+    # Queued inside one max_wait window, so they share a commit
+    first = writer.submit([make_meal("a", 10, at(today, 8)), make_meal("b", 20, at(today, 9))])
+    second = writer.submit([make_meal("c", 30, at(today, 10))])
+
+    assert first.result(timeout=5) == [110, 130]
+    assert second.result(timeout=5) == [160]
+    assert partitioned.get_day_total(DEFAULT_USER, today)["calories"] == 160
+
+
+def test_running_totals_per_day_and_user(writer, partitioned):
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    partitioned.add_meals([make_meal("old", 500, at(yesterday, 12))])
+
+    mixed = writer.submit([make_meal("a", 10, at(today, 8)), make_meal("b", 20, at(yesterday, 20))])
+    other = writer.submit([make_meal("c", 30, at(today, 9))], user="bob")
+
+    assert mixed.result(timeout=5) == [10, 520]
+    assert other.result(timeout=5) == [30]
+    assert writer.stats()["meals_written"] == 3
+
+
+def test_add_meal_returns_day_total(writer):
+    writer.add_meal("a", 100)
+    _, total = writer.add_meal("b", 50)
+    assert total == 150